@@ -1,168 +1,121 @@
 import streamlit as st
+import io
+import re
 import sqlite3
-import hashlib
-import pandas as pd
-import os
-
-# ============= DATABASE FUNCTIONS =============
-def init_db():
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    
-    # Create the base users table
-    c.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        method TEXT NOT NULL,
-        user_id TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL
-    )
-    ''')
-    
-    # Add profile columns if they don't exist (for existing databases)
-    try:
-        c.execute('ALTER TABLE users ADD COLUMN name TEXT')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute('ALTER TABLE users ADD COLUMN username TEXT')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute('ALTER TABLE users ADD COLUMN pronouns TEXT')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute('ALTER TABLE users ADD COLUMN bio TEXT')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute('ALTER TABLE users ADD COLUMN links TEXT')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        c.execute('ALTER TABLE users ADD COLUMN avatar TEXT')
-    except sqlite3.OperationalError:
-        pass
-    conn.commit()
-    conn.close()
+import sys
+import tempfile
+import time
 
-init_db()
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+from career_core import (
+    ADMIN_PAGE_SIZE, AVATAR_DIR, AVATAR_GC_GRACE_S, AVATAR_THUMB_PX, COHORT_TREND_DAYS,
+    DEFAULT_CONFIDENCE, FEEDBACK_MAX_CHARS, JOB_READY_SCORE, LINK_CHECK_CONCURRENCY,
+    LINK_CHECK_HOST_DELAY_S, LINK_CHECK_INTERVAL_S, LINK_CHECK_TTL_S, LOGIN_CLIENT_LIMIT,
+    LOGIN_FAILURE_WINDOW_S, LOGIN_LOCKOUT_S, LOGIN_MAX_FAILURES, PERF_ENABLED, PERF_QUANTILES,
+    PERF_WINDOW, PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_S, SESSION_CACHE_SIZE, SESSION_PARAM,
+    SESSION_TTL_S, assessment_history, catalog_links, check_links_in_background, client_address,
+    cohort_averages, cohort_report, cohort_trend, count_feedback, count_users, delete_user,
+    detect_format, export_feedback, export_users, fetch_skill_ratings, gc_avatars, get_catalog,
+    get_feedback_writer, get_login_guard, get_perf_registry, get_profile, get_scoring_model,
+    get_session_store, get_user_store, hash_password, import_users, invalidate_profile,
+    latest_assessments, link_check_stats, link_statuses, list_feedback, list_users,
+    load_avatar_thumbnail, login_user, main, _np, _pd, perf_fragment, perf_page, perf_rerun,
+    perf_timed, profile_cache_state, record_assessment, run_hash_job, search_catalog,
+    start_cleanup_scheduler, start_link_checker, start_perf_textfile_writer, store_avatar,
+    throttle_account, throttled_message, update_password, user_exists, user_page_cursor, UsernameTaken,
+    validate_credentials,
+)
 
+# ============= ACCOUNT ACTIONS =============
+@perf_timed()
 def register_user(method, user_id, password):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    hashed = hash_password(password)
     try:
-        c.execute("INSERT INTO users (method, user_id, password) VALUES (?, ?, ?)", (method, user_id.strip(), hashed))
-        conn.commit()
-        st.success("Registration successful! You can now sign in.")
-    except sqlite3.IntegrityError:
+        method, user_id, password = validate_credentials(method, user_id, password)
+    except ValueError as e:
+        st.error(f"Cannot register: {e}.")
+        return False
+    hashed = run_hash_job(hash_password, password)
+    if not get_user_store().add_user(method, user_id, hashed):
         st.error("Account already exists. Please log in or use a different email/phone.")
-    conn.close()
-    clean_null_users()
-
-def login_user(method, user_id, password):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    hashed = hash_password(password)
-    c.execute("SELECT * FROM users WHERE method=? AND user_id=? AND password=?", (method, user_id.strip(), hashed))
-    result = c.fetchone()
-    conn.close()
-    return result
-
-def user_exists(method, user_id):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE method=? AND user_id=?", (method, user_id.strip()))
-    result = c.fetchone()
-    conn.close()
-    return result is not None
-
-def update_password(method, user_id, new_password):
-    hashed = hash_password(new_password)
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("UPDATE users SET password=? WHERE method=? AND user_id=?", (hashed, method, user_id.strip()))
-    conn.commit()
-    conn.close()
-
-def fetch_profile(user_id):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    try:
-        c.execute('SELECT name, username, pronouns, bio, links, avatar FROM users WHERE user_id=?', (user_id,))
-        profile = c.fetchone()
-        conn.close()
-        return profile
-    except sqlite3.OperationalError:
-        conn.close()
-        return ("", "", "", "", "", "")
+        return False
+    count_users.clear()
+    st.success("Registration successful! You can now sign in.")
+    return True
 
+@perf_timed()
 def update_profile(user_id, name, username, pronouns, bio, links, avatar):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
+    username = (username or "").strip() or None
     try:
-        c.execute('''
-            UPDATE users
-            SET name=?, username=?, pronouns=?, bio=?, links=?, avatar=?
-            WHERE user_id=?
-        ''', (name, username, pronouns, bio, links, avatar, user_id))
-        conn.commit()
-        conn.close()
+        get_user_store().update_profile(user_id, (name, username, pronouns, bio, links, avatar))
+        invalidate_profile(user_id)
         return True
+    except UsernameTaken:
+        st.error(f"The username '{username}' is already taken.")
+        return False
     except sqlite3.OperationalError as e:
-        conn.close()
         st.error(f"Database error: {e}")
         return False
 
-def clean_null_users():
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM users WHERE user_id='' OR password='' OR user_id IS NULL OR password IS NULL")
-    conn.commit()
-    conn.close()
-
-def list_users():
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("SELECT id, method, user_id FROM users")
-    users = c.fetchall()
-    conn.close()
-    return users
-
-def delete_user(user_id):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute("DELETE FROM users WHERE user_id=?", (user_id.strip(),))
-    conn.commit()
-    conn.close()
-
 # ============= SESSION INIT =============
-if 'logged_in' not in st.session_state:
-    st.session_state['logged_in'] = False
-if 'user' not in st.session_state:
-    st.session_state['user'] = ""
-if 'user_method' not in st.session_state:
-    st.session_state['user_method'] = None
-if 'nav' not in st.session_state:
-    st.session_state['nav'] = "Home"
-if "reset_show" not in st.session_state:
-    st.session_state["reset_show"] = False
-if "edit_profile_mode" not in st.session_state:
-    st.session_state["edit_profile_mode"] = False
-if "show_signup" not in st.session_state:
-    st.session_state["show_signup"] = False
+SESSION_DEFAULTS = {
+    'logged_in': False,
+    'user': "",
+    'user_method': None,
+    'nav': "Home",
+    "reset_show": False,
+    "edit_profile_mode": False,
+    "show_signup": False,
+}
+
+def init_session_state():
+    for key, value in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+
+def start_session(user_id, method):
+    st.session_state['logged_in'] = True
+    st.session_state['user'] = user_id
+    st.session_state['user_method'] = method
+    st.query_params[SESSION_PARAM] = get_session_store().issue(user_id, method)
+
+def restore_session():
+    """Sign in from the session token in the URL, or sign out if it was revoked.
+
+    Signing in this way replaces the token in the URL with a new one. So does
+    a signed-in tab whose token another tab has replaced.
+    """
+    token = st.query_params.get(SESSION_PARAM)
+    if not token:
+        return
+    store = get_session_store()
+    signed_in = st.session_state['logged_in']
+    session = store.check(token, signed_in)
+    if session is not None and (not signed_in or session[2]):
+        token = store.rotate(token)
+        if token is None:
+            session = None
+        else:
+            st.query_params[SESSION_PARAM] = token
+            if not signed_in:
+                st.session_state['logged_in'] = True
+                st.session_state['user'], st.session_state['user_method'] = session[:2]
+    if session is None:
+        del st.query_params[SESSION_PARAM]
+        if st.session_state['logged_in']:
+            logout()
 
 def logout():
+    token = st.query_params.get(SESSION_PARAM)
+    if token:
+        get_session_store().revoke(token)
+        del st.query_params[SESSION_PARAM]
     st.session_state['logged_in'] = False
     st.session_state['user'] = ""
     st.session_state['user_method'] = None
     st.session_state['edit_profile_mode'] = False
     st.session_state['show_signup'] = False
+    # Per-user page state must not leak into the next sign-in on this browser.
+    for key in ("skill_ratings", "career_select"):
+        st.session_state.pop(key, None)
     st.info("You've been logged out. Please sign in again.")
 
 # ============= UI HELPERS =============
@@ -189,79 +142,140 @@ def password_reset_modal():
         kind = "email" if reset_method == "E-mail" else "phone"
         if not reset_id.strip() or not new_pass:
             st.warning("Please enter both your registered email/phone and a new password.")
-        elif not user_exists(kind, reset_id):
-            st.error("No such account found.")
         else:
-            update_password(kind, reset_id, new_pass)
-            st.success("Password updated! You can now sign in with your new password.")
+            guard = get_login_guard()
+            reset_key = "reset:" + throttle_account(kind, reset_id)
+            wait_s = guard.check(reset_key, client_address())
+            if wait_s:
+                st.error(throttled_message(wait_s))
+            else:
+                # Every reset attempt counts, so one account cannot be reset in a loop.
+                guard.record_failure(reset_key)
+                if not user_exists(kind, reset_id):
+                    st.error("No such account found.")
+                else:
+                    update_password(kind, reset_id, new_pass)
+                    st.success("Password updated! You can now sign in with your new password.")
+
+# ============= STATIC MARKUP =============
+# Whitespace is collapsed so every rerun sends the browser a shorter delta.
+# Like the rest of this file, these are rebuilt on every rerun; that costs a
+# few regex passes. Anything expensive belongs in career_core, which is
+# imported once per process.
+def compact_html(markup):
+    return re.sub(r"\s+", " ", markup).strip()
+
+LOGIN_CSS = compact_html("""
+<style>
+.main-card {
+    # max-width: 00px;
+    # margin: 0 auto 1.5em auto; /* Removed top space! */
+    # border-radius:0px;
+    # border: 1.5px solid #E0E0E0;
+    # background:#f8fafc;
+    # box-shadow: none; /* Remove all shadow */
+    # padding:2.5em 2em 2em 2em;
+}
+.field-label {
+    font-weight:600;
+    margin-bottom: 0.4em;
+    letter-spacing: 0.01em;
+    color: #46506a;
+    font-size: 1.1em;
+}
+.login-title { 
+    font-size:2.4em;
+    font-weight:700;
+    margin-bottom:0.4em;
+    color: #425ad7;
+    text-align:center;
+}
+.login-caption {
+    font-size:1.15em;
+    color:#596085;
+    margin-bottom:2.5em;
+    margin-top:-0.8em;
+    font-weight: 400;
+    letter-spacing: 0.03em;
+    text-align:center;
+}
+.signin-subtitle {
+    font-size:1.8em;
+    color:#2c3e50;
+    margin-bottom:1.2em;
+    font-weight:600;
+    text-align:center;
+}
+.signup-link {
+    text-align:center;
+    margin-top:1.5em;
+    font-size:1.1em;
+    color:#666;
+}
+.signup-link a {
+    color:#425ad7;
+    text-decoration:none;
+    font-weight:600;
+}
+.signup-link a:hover {
+    text-decoration:underline;
+}
+</style>
+""")
+
+LOGIN_HEADER_HTML = compact_html("""
+<div style='text-align:center;margin-bottom:1.5em;'>
+    <div class='login-title'>Welcome to Career Navigator Pro</div>
+    <div class='login-caption'><b>where ambition meets opportunity. </b></div>
+</div>
+""")
+
+HOME_BANNER_HTML = compact_html("""
+<div style='border-radius:8px;padding:1.2em 1em;background:linear-gradient(90deg,#667eea 0,#764ba2 100%);color:#fff;margin-bottom:10px;'>
+<h2 style='margin-bottom:10px;'>Career Navigator Pro</h2>
+<h5 style='margin-top:0;'>Shape Your Future. Bridge The Gap.</h5>
+<p style='margin-bottom:0.5em;font-size:1.15em;'>Empowering you with skills, resources, and confidence for tomorrow's careers!</p>
+</div>
+""")
+
+PROFILE_CSS = compact_html("""
+<style>
+.profile-header {
+    text-align:center; margin-bottom:1.2em;
+}
+.avatar-img {
+    display: block; margin-left:auto; margin-right:auto;
+    border-radius:50%; width:120px; height:120px; object-fit:cover;
+    box-shadow: 0 2px 8px #0002;
+}
+.pf-label {
+    color:#6172c7; font-size:1.05em; font-weight:600;
+    margin-bottom: 0.3em;
+}
+.pf-row {
+    margin:0.3em 0 1em 0; font-size:1.18em;
+    padding: 0.5em;
+    background: #f8f9fa;
+    border-radius: 8px;
+    border-left: 3px solid #6172c7;
+}
+.pf-bio {
+    font-size:1.09em; color:#445;
+    margin-bottom:0.8em; margin-top:0.25em;
+    padding: 0.5em;
+    background: #f8f9fa;
+    border-radius: 8px;
+    border-left: 3px solid #6172c7;
+}
+</style>
+""")
 
 # ============= LOGIN PAGE =============
 def login_page():
-    st.markdown("""
-    <style>
-    .main-card {
-        # max-width: 00px;
-        # margin: 0 auto 1.5em auto; /* Removed top space! */
-        # border-radius:0px;
-        # border: 1.5px solid #E0E0E0;
-        # background:#f8fafc;
-        # box-shadow: none; /* Remove all shadow */
-        # padding:2.5em 2em 2em 2em;
-    }
-    .field-label {
-        font-weight:600;
-        margin-bottom: 0.4em;
-        letter-spacing: 0.01em;
-        color: #46506a;
-        font-size: 1.1em;
-    }
-    .login-title { 
-        font-size:2.4em;
-        font-weight:700;
-        margin-bottom:0.4em;
-        color: #425ad7;
-        text-align:center;
-    }
-    .login-caption {
-        font-size:1.15em;
-        color:#596085;
-        margin-bottom:2.5em;
-        margin-top:-0.8em;
-        font-weight: 400;
-        letter-spacing: 0.03em;
-        text-align:center;
-    }
-    .signin-subtitle {
-        font-size:1.8em;
-        color:#2c3e50;
-        margin-bottom:1.2em;
-        font-weight:600;
-        text-align:center;
-    }
-    .signup-link {
-        text-align:center;
-        margin-top:1.5em;
-        font-size:1.1em;
-        color:#666;
-    }
-    .signup-link a {
-        color:#425ad7;
-        text-decoration:none;
-        font-weight:600;
-    }
-    .signup-link a:hover {
-        text-decoration:underline;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(LOGIN_CSS, unsafe_allow_html=True)
 
     # App Title and Caption
-    st.markdown("""
-    <div style='text-align:center;margin-bottom:1.5em;'>
-        <div class='login-title'>Welcome to Career Navigator Pro</div>
-        <div class='login-caption'><b>where ambition meets opportunity. </b></div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(LOGIN_HEADER_HTML, unsafe_allow_html=True)
 
     # Center the login form
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -283,14 +297,19 @@ def login_page():
             
             if sign_in:
                 kind = "email" if login_method == "E-mail" else "phone"
-                result = login_user(kind, login_id, login_pass)
-                if result:
-                    st.session_state['logged_in'] = True
-                    st.session_state['user'] = login_id
-                    st.session_state['user_method'] = kind
+                guard = get_login_guard()
+                account = throttle_account(kind, login_id)
+                wait_s = guard.check(account, client_address())
+                result = None if wait_s else login_user(kind, login_id, login_pass)
+                if wait_s:
+                    st.error(throttled_message(wait_s))
+                elif result:
+                    guard.record_success(account)
+                    start_session(result[2], kind)
                     st.success(f"Welcome, {login_id}!")
                     st.rerun()
                 else:
+                    guard.record_failure(account)
                     st.error("Invalid credentials. Please try again.")
             
             if forgot_btn:
@@ -325,11 +344,9 @@ def login_page():
                     st.warning("Please enter all details.")
                 elif user_exists(kind, reg_id):
                     st.error("Account already exists. Try logging in.")
-                else:
-                    register_user(kind, reg_id, reg_pass)
-                    if not st.session_state.get('error_occurred', False):  # If registration was successful
-                        st.session_state["show_signup"] = False
-                        st.rerun()
+                elif register_user(kind, reg_id, reg_pass):
+                    st.session_state["show_signup"] = False
+                    st.rerun()
             st.markdown("</div>", unsafe_allow_html=True)
             
             st.markdown("""
@@ -348,48 +365,16 @@ def login_page():
 # ============ PROFILE PAGE ============
 def user_profile_page():
     st.subheader("My Profile")
-    profile = fetch_profile(st.session_state['user'])
+    profile = get_profile(st.session_state['user'])
     if profile:
         name, username, pronouns, bio, links, avatar = profile
     else:
         name, username, pronouns, bio, links, avatar = ("", "", "", "", "", "")
-    st.markdown("""
-    <style>
-    .profile-header {
-        text-align:center; margin-bottom:1.2em;
-    }
-    .avatar-img {
-        display: block; margin-left:auto; margin-right:auto;
-        border-radius:50%; width:120px; height:120px; object-fit:cover;
-        box-shadow: 0 2px 8px #0002;
-    }
-    .pf-label {
-        color:#6172c7; font-size:1.05em; font-weight:600;
-        margin-bottom: 0.3em;
-    }
-    .pf-row {
-        margin:0.3em 0 1em 0; font-size:1.18em;
-        padding: 0.5em;
-        background: #f8f9fa;
-        border-radius: 8px;
-        border-left: 3px solid #6172c7;
-    }
-    .pf-bio {
-        font-size:1.09em; color:#445;
-        margin-bottom:0.8em; margin-top:0.25em;
-        padding: 0.5em;
-        background: #f8f9fa;
-        border-radius: 8px;
-        border-left: 3px solid #6172c7;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(PROFILE_CSS, unsafe_allow_html=True)
     if not st.session_state.get("edit_profile_mode", False):
         st.markdown("<div class='profile-header'>", unsafe_allow_html=True)
-        if avatar and os.path.exists(avatar):
-            st.image(avatar, width=120)
-        else:
-            st.image('https://cdn-icons-png.flaticon.com/512/3177/3177440.png', width=120)
+        thumbnail = load_avatar_thumbnail(avatar) if avatar else None
+        st.image(thumbnail or 'https://cdn-icons-png.flaticon.com/512/3177/3177440.png', width=AVATAR_THUMB_PX)
         st.markdown("</div>", unsafe_allow_html=True)
         st.markdown("<div class='pf-label'>Name</div>", unsafe_allow_html=True)
         st.markdown(f"<div class='pf-row'>{name or 'Not provided'}</div>", unsafe_allow_html=True)
@@ -420,12 +405,9 @@ def user_profile_page():
         if save_btn:
             avatar_path = avatar or ""
             if avatar_file:
-                os.makedirs("profile_avatars", exist_ok=True)
-                avatar_path = f"profile_avatars/{st.session_state['user']}_{avatar_file.name}"
                 try:
-                    with open(avatar_path, "wb") as f:
-                        f.write(avatar_file.read())
-                except Exception as e:
+                    avatar_path = store_avatar(avatar_file)
+                except (OSError, ValueError) as e:
                     st.error(f"Error saving image: {e}")
                     avatar_path = avatar or ""
             success = update_profile(
@@ -447,20 +429,149 @@ def user_profile_page():
             st.session_state["edit_profile_mode"] = False
             st.rerun()
 
-# ============ ADMIN AND APP (unchanged) ============
-def admin_page():
-    st.subheader("🛠️ Admin: User Database & Cleaning")
-    users = list_users()
+# ============ ADMIN AND APP ============
+@perf_fragment
+def admin_user_browser():
+    col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+    search = col1.text_input("Search by User ID", key="admin_search").strip()
+    match = col2.selectbox("Match", ["prefix", "contains"], key="admin_match")
+    method = col3.selectbox("Method", ["all", "email", "phone"], key="admin_method")
+    page_size_options = sorted({25, ADMIN_PAGE_SIZE, 100, 200})
+    page_size = col4.selectbox("Rows per page", page_size_options,
+                               index=page_size_options.index(ADMIN_PAGE_SIZE), key="admin_page_size")
+    method = None if method == "all" else method
+
+    # The cursor stack holds the list_users cursor of every page visited so
+    # far; changing any filter starts again from the first page.
+    filters = (search, match, method, page_size)
+    if st.session_state.get("admin_filters") != filters:
+        st.session_state["admin_filters"] = filters
+        st.session_state["admin_cursors"] = [0]
+    cursors = st.session_state["admin_cursors"]
+
+    # One extra row tells us whether there is a next page without a COUNT.
+    rows = list_users(cursors[-1], page_size + 1, search, method, match)
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    total = count_users(search, method, match)
+
     pretty_card(
-        "All Users",
-        "",
+        "Users" if not (search or method) else "Matching Users",
+        f"{total} account(s), {page_size} per page — page {len(cursors)}",
         icon="📋"
     )
-    if users:
-        df = pd.DataFrame(users, columns=["ID", "Method", "User ID"])
-        st.dataframe(df, use_container_width=True)
+    if rows:
+        df = _pd().DataFrame(rows, columns=["ID", "Method", "User ID"])
+        st.dataframe(df, use_container_width=True, hide_index=True)
     else:
-        st.info("No users found in database.")
+        st.info("No accounts match these filters." if search or method else "No accounts yet.")
+    # Callbacks move the cursor before the next run, so no extra rerun is needed.
+    prev_col, next_col = st.columns(2)
+    prev_col.button("← Previous", key="admin_prev_page", disabled=len(cursors) == 1, on_click=cursors.pop)
+    next_col.button("Next →", key="admin_next_page", disabled=not has_next,
+                    on_click=cursors.append, args=(user_page_cursor(rows[-1], search, match) if rows else 0,))
+
+@perf_fragment
+def admin_bulk_tools():
+    with st.expander("📥 Bulk import / export"):
+        st.caption("Import a CSV or JSONL file with method (email/phone), user_id and password columns.")
+        upload = st.file_uploader("Accounts file", type=["csv", "jsonl"], key="bulk_import_file")
+        if upload is not None and st.button("Import accounts", key="bulk_import_btn"):
+            with st.spinner("Importing accounts..."):
+                report = import_users(io.TextIOWrapper(upload, encoding="utf-8", newline=""), detect_format(upload.name))
+            st.success(f"Imported {report.inserted} account(s).")
+            rejected = [(*r, "conflict") for r in report.conflicts] + [(*r, "invalid") for r in report.invalid]
+            if rejected:
+                st.warning(f"{len(rejected)} row(s) were skipped.")
+                st.dataframe(_pd().DataFrame(sorted(rejected)[:500], columns=["Line", "User ID", "Reason", "Kind"]),
+                             use_container_width=True, hide_index=True)
+        export_download(export_users, "users", "account(s)", "bulk_export")
+
+def export_download(export, name, noun, key):
+    fmt = st.selectbox("Export format", ["csv", "jsonl"], key=f"{key}_fmt")
+    if st.button("Prepare export", key=f"{key}_btn"):
+        # Rows are streamed from SQLite to a temporary file in batches, never
+        # held in memory as Python rows. Streamlit serves downloads from
+        # bytes, so only the encoded file is read back.
+        with tempfile.TemporaryFile("w+b") as export_file:
+            text = io.TextIOWrapper(export_file, encoding="utf-8", newline="", write_through=True)
+            count = export(text, fmt)
+            # Detach so that closing (or collecting) the wrapper leaves the file open.
+            text.flush()
+            text.detach()
+            export_file.seek(0)
+            data = export_file.read()
+        st.download_button(f"Download {count} {noun}", data, file_name=f"{name}.{fmt}",
+                           key=f"{key}_download")
+
+@perf_fragment
+def admin_feedback_browser():
+    with st.expander("💬 Feedback"):
+        writer = get_feedback_writer()
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Stored", count_feedback())
+        col2.metric("Waiting to be written", writer.pending)
+        col3.metric("Write batches", writer.batches)
+        col4.metric("Rejected (buffer full)", writer.rejected)
+        col5.metric("Refused by database", writer.failed)
+        if writer.last_error:
+            st.error(f"Last feedback write failed: {writer.last_error}")
+        if writer.dead_letters:
+            st.caption("Most recent entries the database refused:")
+            refused = _pd().DataFrame(list(writer.dead_letters), columns=["User ID", "Message", "Submitted", "Error"])
+            refused["Submitted"] = _pd().to_datetime(refused["Submitted"], unit="s")
+            st.dataframe(refused, use_container_width=True, hide_index=True)
+
+        # Newest first; the cursor stack holds the before_id of every page visited.
+        cursors = st.session_state.setdefault("feedback_cursors", [None])
+        rows = list_feedback(cursors[-1], ADMIN_PAGE_SIZE + 1)
+        has_next = len(rows) > ADMIN_PAGE_SIZE
+        rows = rows[:ADMIN_PAGE_SIZE]
+        if rows:
+            df = _pd().DataFrame(rows, columns=["ID", "User ID", "Message", "Submitted"])
+            df["Submitted"] = _pd().to_datetime(df["Submitted"], unit="s")
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No feedback yet.")
+        prev_col, next_col = st.columns(2)
+        prev_col.button("← Newer", key="feedback_prev_page", disabled=len(cursors) == 1, on_click=cursors.pop)
+        next_col.button("Older →", key="feedback_next_page", disabled=not has_next,
+                        on_click=cursors.append, args=(rows[-1][0] if rows else None,))
+        export_download(export_feedback, "feedback", "feedback entries", "feedback_export")
+
+@perf_fragment
+def admin_cohort_report():
+    with st.expander("📊 Cohort readiness"):
+        st.caption(f"Scores every user's saved skill ratings against every domain; job-ready means {JOB_READY_SCORE}+.")
+        if st.button("Score all users", key="cohort_report_btn"):
+            catalog = get_catalog()
+            started = time.perf_counter()
+            users, report = cohort_report(get_scoring_model(catalog["revision"], catalog))
+            if not users:
+                st.info("No user has saved skill ratings yet.")
+            else:
+                st.caption(f"Scored {users} user(s) in {time.perf_counter() - started:.2f}s.")
+                st.dataframe(report, use_container_width=True, hide_index=True)
+
+def admin_assessment_trends():
+    with st.expander("📈 Assessment trends"):
+        averages = cohort_averages()
+        if not averages:
+            st.info("No assessments saved yet.")
+            return
+        st.caption("Averages of each user's latest assessment per domain.")
+        st.dataframe(
+            _pd().DataFrame(averages, columns=["Domain", "Users", "Mean readiness", "Job-ready %"]).round(1),
+            use_container_width=True, hide_index=True,
+        )
+        trend = _pd().DataFrame(cohort_trend(), columns=["Day", "Domain", "Assessments", "Mean readiness"])
+        if trend["Day"].nunique() > 1:
+            st.caption(f"Mean readiness of assessments saved per day, last {COHORT_TREND_DAYS} days.")
+            st.line_chart(trend.pivot(index="Day", columns="Domain", values="Mean readiness"))
+
+def admin_page():
+    st.subheader("🛠️ Admin: Users & Operations")
+    admin_user_browser()
     del_user = st.text_input("Delete a user (enter User ID):", value="", key="delete_user_admin")
     if st.button("Delete User", key="delete_user_btn"):
         if del_user.strip():
@@ -468,32 +579,137 @@ def admin_page():
             st.success("User deleted (if existed). Refresh the page to see updates.")
             st.rerun()
     st.markdown("---")
-    if st.button("🧹 Clean Null/Empty Accounts", key="clean_db_btn"):
-        clean_null_users()
-        st.success("Cleaned empty/null users from DB.")
-        st.rerun()
+    admin_bulk_tools()
+    admin_feedback_browser()
+    admin_cohort_report()
+    admin_assessment_trends()
+    st.markdown("---")
+    admin_profile_cache_panel()
+    st.markdown("---")
+    admin_session_panel()
+    st.markdown("---")
+    admin_throttle_panel()
+    st.markdown("---")
+    admin_avatar_panel()
+    st.markdown("---")
+    admin_link_health_panel()
+
+def admin_profile_cache_panel():
+    state = profile_cache_state()
+    st.markdown("#### 🗂️ Profile cache")
+    st.caption(f"TTL {PROFILE_CACHE_TTL_S}s, up to {PROFILE_CACHE_SIZE} entries.")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hits", state.hits)
+    col2.metric("Misses", state.misses)
+    col3.metric("Hit rate", f"{state.hits / state.lookups:.0%}" if state.lookups else "–")
+    col4.metric("Invalidations", state.invalidations)
+
+def admin_session_panel():
+    store = get_session_store()
+    st.markdown("#### 🔐 Sign-in sessions")
+    st.caption(f"Sessions last {SESSION_TTL_S // 3600}h; up to {SESSION_CACHE_SIZE} are cached per process.")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Active", store.active_sessions())
+    col2.metric("Cached", len(store.cache))
+    col3.metric("Cache hits", store.hits)
+    col4.metric("Cache misses", store.misses)
+
+def admin_throttle_panel():
+    guard = get_login_guard()
+    st.markdown("#### 🚦 Sign-in throttling")
+    st.caption(f"{LOGIN_MAX_FAILURES} failed sign-ins within {LOGIN_FAILURE_WINDOW_S // 60} min lock an account for "
+               f"{LOGIN_LOCKOUT_S // 60} min; each client may try {LOGIN_CLIENT_LIMIT} times a minute.")
+    lockouts = guard.active_lockouts()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Locked accounts", len(lockouts))
+    col2.metric("Lockouts (since start)", guard.locked_total)
+    col3.metric("Rejected attempts", guard.throttled)
+    if lockouts:
+        st.dataframe(
+            _pd().DataFrame(
+                [(account, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(until))) for account, until in lockouts],
+                columns=["Account", "Locked until"],
+            ),
+            use_container_width=True, hide_index=True,
+        )
+        account = st.selectbox("Unlock account", [account for account, _ in lockouts], key="unlock_account")
+        if st.button("Unlock", key="unlock_account_btn"):
+            guard.unlock(account)
+            st.success(f"Unlocked {account}.")
+            st.rerun()
+
+def admin_avatar_panel():
+    st.markdown("#### 🖼️ Avatar storage")
+    st.caption(f"Files in {AVATAR_DIR} that no profile references are removed after {AVATAR_GC_GRACE_S}s.")
+    if st.button("Remove unreferenced avatars", key="gc_avatars_btn"):
+        removed, freed = gc_avatars()
+        st.success(f"Removed {removed} file(s), {freed / 1024:.0f} KB freed.")
+
+@perf_fragment
+def admin_link_health_panel():
+    stats = link_check_stats()
+    st.markdown("#### 🔗 Resource link health")
+    schedule = f"every {LINK_CHECK_INTERVAL_S}s" if LINK_CHECK_INTERVAL_S > 0 else "disabled"
+    st.caption(f"Background check: {schedule}, for links last checked over {LINK_CHECK_TTL_S // 3600}h ago; "
+               f"{LINK_CHECK_CONCURRENCY} requests at a time, {LINK_CHECK_HOST_DELAY_S:g}s apart per host.")
+    col1, col2, col3 = st.columns(3)
+    started = False
+    if col1.button("Check stale links", key="link_check_btn", disabled=stats.running):
+        check_links_in_background()
+        started = True
+    if col2.button("Recheck all links", key="link_recheck_btn", disabled=stats.running):
+        check_links_in_background(force=True)
+        started = True
+    col3.button("Refresh", key="link_refresh_btn")
+    if started or stats.running:
+        st.info("Checking links in the background; refresh to see the results.")
+    if stats.last_error:
+        st.error(f"Last check failed: {stats.last_error}")
+
+    links = catalog_links(get_catalog())
+    statuses = link_statuses()
+    checked = [statuses[url] for url in links if url in statuses]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Links", len(links))
+    col2.metric("Broken", sum(not r.ok for r in checked))
+    col3.metric("Not checked yet", len(links) - len(checked))
+    col4.metric("Last run (ms)", f"{stats.last_duration_ms:.0f}" if stats.runs else "–")
+    rows = []
+    for url, names in links.items():
+        r = statuses.get(url)
+        rows.append((
+            "–" if r is None else "✅" if r.ok else "❌", ", ".join(names), url,
+            r and r.status, r.error if r else "", r.failures if r else 0,
+            r and round(r.elapsed_ms), r and r.checked_at,
+        ))
+    # Broken first, then unchecked, then working links.
+    rows.sort(key=lambda row: ("❌", "–", "✅").index(row[0]))
+    df = _pd().DataFrame(rows, columns=["", "Resources", "URL", "HTTP", "Error", "Failures", "ms", "Checked"])
+    df["Checked"] = _pd().to_datetime(df["Checked"], unit="s")
+    st.dataframe(df, use_container_width=True, hide_index=True)
 
 def professional_app():
     st.sidebar.image("https://cdn-icons-png.flaticon.com/512/190/190411.png", width=80)
     st.sidebar.title("Career Navigator Pro")
     st.sidebar.write(f"Signed in as: {st.session_state['user']}")
+    pages = ["Home", "My Career Path", "Top Skills", "Resources", "Feedback", "Profile", "Admin"]
+    if st.session_state['user'] == 'admin':
+        pages.append("Performance")
     nav = st.sidebar.radio(
         "Navigation",
-        ["Home", "My Career Path", "Top Skills", "Resources", "Feedback", "Profile", "Admin"],
+        pages,
         key="main_nav"
     )
     st.sidebar.markdown("---")
     if st.sidebar.button("Log Out"):
         logout()
         st.rerun()
+    with perf_page(nav):
+        render_page(nav)
+
+def render_page(nav):
     if nav == "Home":
-        st.markdown("""
-            <div style='border-radius:8px;padding:1.2em 1em;background:linear-gradient(90deg,#667eea 0,#764ba2 100%);color:#fff;margin-bottom:10px;'>
-            <h2 style='margin-bottom:10px;'>Career Navigator Pro</h2>
-            <h5 style='margin-top:0;'>Shape Your Future. Bridge The Gap.</h5>
-            <p style='margin-bottom:0.5em;font-size:1.15em;'>Empowering you with skills, resources, and confidence for tomorrow's careers!</p>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(HOME_BANNER_HTML, unsafe_allow_html=True)
         st.image("https://img.freepik.com/premium-vector/guidance-concept-career-hiking_118813-4269.jpg", width=340)
         st.header("Why Career Navigator?")
         st.markdown("""
@@ -503,57 +719,43 @@ def professional_app():
         - *Spotlight: Trending skills & future tech*  
         """)
     elif nav == "My Career Path":
+        catalog = get_catalog()
         st.markdown("### 1️⃣ Select your career interest/domain")
-        domains = ["AI & ML", "Web Development", "Cybersecurity", "Data Science", "Cloud", "Blockchain",
-                   "Digital Marketing", "UI/UX", "Finance", "Product", "Other"]
-        domain = st.selectbox("What's your dream career area?", domains, key="career_select")
-        st.markdown("### 2️⃣ Rate your confidence level")
-        confidence = st.slider("How would you rate your current knowledge?", 0, 100, 50, key="confidence_slider")
-        req = 70
-        st.progress(confidence / 100)
-        if confidence < req:
-            st.error(f"Skill Gap: {req-confidence} points to reach job-ready level.")
-        else:
-            st.success("You're currently job-ready!")
+        if "career_select" not in st.session_state:
+            # Reopen the domain the user assessed most recently.
+            latest = latest_assessments(st.session_state['user'])
+            if latest and latest[0][0] in catalog["domains"]:
+                st.session_state["career_select"] = latest[0][0]
+        domain = st.selectbox("What's your dream career area?", catalog["domains"], key="career_select")
+        career_readiness(catalog, domain)
+        career_progress(domain)
         show_res_btn = st.button("Show learning resources", key="show_resources_btn")
         if show_res_btn:
-            with st.spinner("Fetching best materials..."):
-                res = [
-                    {"name": "FreeCodeCamp", "link": "https://freecodecamp.org", "desc": "Interactive coding and learning"},
-                    {"name": "Coursera Free", "link": "https://coursera.org/courses?price=free", "desc": "Free university-level courses"},
-                    {"name": "YouTube Tutorials", "link": f"https://youtube.com/results?search_query={domain}+tutorial", "desc": "Video lessons"},
-                    {"name": "GeeksforGeeks", "link": "https://geeksforgeeks.org", "desc": "Notes and practice problems"},
-                    {"name": "MIT OpenCourseWare", "link": "https://ocw.mit.edu/", "desc": "World-class university tutorials"}
-                ]
-                st.markdown("#### *Recommended Resources*")
-                for r in res:
-                    st.info(f"[{r['name']}]({r['link']}) — {r['desc']}")
+            st.markdown("#### *Recommended Resources*")
+            for r in catalog["by_domain"][domain]:
+                st.info(f"[{r['name']}]({r['link']}) — {r['desc']}")
+        catalog_search_box()
     elif nav == "Top Skills":
+        catalog = get_catalog()
         st.markdown("### 🌟 Trending & Future Skills")
         col1, col2 = st.columns(2)
-        now = ["AI & ML", "Data Science", "Cloud", "Web/Mobile Apps", "Cybersecurity", "Blockchain"]
-        future = ["Quantum Computing", "Augmented Reality", "Robotics", "Edge AI", "IoT/Industry 4.0", "GreenTech"]
         with col1:
             st.subheader("Hot Right Now")
-            for skill in now:
+            for skill in catalog["skills_now"]:
                 st.success(skill)
         with col2:
             st.subheader("Shaping the Future")
-            for skill in future:
+            for skill in catalog["skills_future"]:
                 st.info(skill)
         st.caption("Based on global job market & tech industry analysis.")
     elif nav == "Resources":
         st.markdown("### 📚 Universal Resources")
         st.markdown("Find great notes, cheat sheets, and tutorials for every tech domain:")
-        st.write("- [MIT OpenCourseWare](https://ocw.mit.edu/)")
-        st.write("- [GitHub Trending](https://github.com/trending)")
-        st.write("- [GeeksforGeeks](https://geeksforgeeks.org/)")
-        st.write("- [Codecademy](https://www.codecademy.com/)")
+        for r in get_catalog()["universal_resources"]:
+            st.write(f"- [{r['name']}]({r['link']})")
     elif nav == "Feedback":
         st.markdown("### 💬 Share your feedback!")
-        feedback = st.text_area("Tell us your thoughts, suggestions, or feature requests:")
-        if st.button("Submit feedback", key="feedback_btn"):
-            st.success("Thank you! We appreciate your input and will use it to improve.")
+        feedback_form()
     elif nav == "Profile":
         user_profile_page()
     elif nav == "Admin":
@@ -561,10 +763,159 @@ def professional_app():
             admin_page()
         else:
             st.error("Access denied (admin only).")
+    elif nav == "Performance":
+        if st.session_state['user'] == 'admin':
+            performance_page()
+        else:
+            st.error("Access denied (admin only).")
 
-st.set_page_config(page_title="Career Navigator Pro", layout='wide', page_icon="🎓")
+# Widgets inside these fragments rerun only their own fragment, not the sidebar
+# and the rest of the page.
+@perf_fragment
+def catalog_search_box():
+    st.markdown("### 🔎 Search resources and skills")
+    query = st.text_input("Search", placeholder="e.g. python, cloud security, ux", key="catalog_search",
+                          label_visibility="collapsed")
+    if query.strip():
+        results = search_catalog(query)
+        if not results:
+            st.info("No matching resources or skills.")
+        for r in results:
+            if r["kind"] == "skill":
+                st.success(f"Skill: {r['name']} — {r['desc']}")
+            else:
+                st.info(f"[{r['name']}]({r['link']}) — {r['desc']}")
 
-if st.session_state['logged_in']:
-    professional_app()
-else:
-    login_page()
+@perf_fragment
+def feedback_form():
+    feedback = st.text_area("Tell us your thoughts, suggestions, or feature requests:", max_chars=FEEDBACK_MAX_CHARS)
+    if st.button("Submit feedback", key="feedback_btn"):
+        if not feedback.strip():
+            st.warning("Please write your feedback first.")
+        elif get_feedback_writer().submit(st.session_state['user'], feedback.strip()):
+            st.success("Thank you! We appreciate your input and will use it to improve.")
+        else:
+            st.error("We're receiving a lot of feedback right now. Please try again in a moment.")
+
+@perf_fragment
+def career_readiness(catalog, domain):
+    model = get_scoring_model(catalog["revision"], catalog)
+    st.markdown("### 2️⃣ Rate your confidence in each skill")
+    if domain not in model.domain_index:
+        st.info("There is no skill profile for this area yet.")
+        return
+    # Ratings from every domain visited this session, seeded from the database.
+    if "skill_ratings" not in st.session_state:
+        st.session_state["skill_ratings"] = fetch_skill_ratings(st.session_state['user'])
+    ratings = st.session_state["skill_ratings"]
+    for skill in model.domain_skills(domain):
+        ratings[skill] = st.slider(skill, 0, 100, ratings.get(skill, DEFAULT_CONFIDENCE), key=f"skill_{skill}")
+    confidence = model.confidence_vector(ratings)
+    readiness, _ = model.score(confidence[None, :])
+    score = float(readiness[0, model.domain_index[domain]])
+    st.progress(score / 100, text=f"Readiness for {domain}: {score:.0f}/100")
+    if score < JOB_READY_SCORE:
+        st.error(f"Skill Gap: {_np().ceil(JOB_READY_SCORE - score):.0f} points to reach job-ready level.")
+    else:
+        st.success("You're currently job-ready!")
+    focus = model.recommend(confidence, domain)
+    if focus:
+        st.markdown("**Focus next on:** " + ", ".join(f"{skill} (+{points:.0f})" for skill, points in focus))
+    ranked = _np().argsort(-readiness[0], kind="stable")[:3]
+    st.caption("Best fit with your current skills: " +
+               ", ".join(f"{model.domains[d]} ({readiness[0, d]:.0f})" for d in ranked))
+    if st.session_state.pop("assessment_saved", False):
+        st.success("Assessment saved.")
+    if st.button("Save assessment", key="save_skill_ratings_btn"):
+        record_assessment(st.session_state['user'], domain, score, ratings, model.domain_skills(domain))
+        # Rerun the whole page so the progress section below picks up the new entry.
+        st.session_state["assessment_saved"] = True
+        st.rerun()
+
+def career_progress(domain):
+    latest = latest_assessments(st.session_state['user'])
+    if not latest:
+        return
+    st.markdown("### 📈 Your progress")
+    history = assessment_history(st.session_state['user'], domain)
+    if len(history) > 1:
+        chart = _pd().DataFrame(history, columns=["Assessed", "Readiness"])
+        chart["Assessed"] = _pd().to_datetime(chart["Assessed"], unit="s")
+        st.line_chart(chart, x="Assessed", y="Readiness")
+    df = _pd().DataFrame(
+        [
+            (d, score, None if prev is None else score - prev, score - first, n,
+             time.strftime("%Y-%m-%d", time.localtime(updated)))
+            for d, score, prev, first, n, updated in latest
+        ],
+        columns=["Domain", "Latest", "Change", "Since first", "Assessments", "Last assessed"],
+    )
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+def performance_page():
+    st.subheader("⏱️ Performance")
+    if not PERF_ENABLED:
+        st.info("Instrumentation is off. Unset CAREER_APP_PERF=0 and restart to collect timings.")
+        return
+    registry = get_perf_registry()
+    snapshot = registry.snapshot()
+    totals = {}
+    for family, _label, count, total, _quantiles, _max in snapshot:
+        seen_count, seen_total = totals.get(family, (0, 0.0))
+        totals[family] = (seen_count + count, seen_total + total)
+    reruns, rerun_seconds = totals.get("rerun", (0, 0.0))
+    _, db_seconds = totals.get("rerun_db", (0, 0.0))
+    _, db_calls = totals.get("rerun_db_calls", (0, 0.0))
+    uptime = time.time() - registry.started_at
+    st.caption(f"Process-wide since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(registry.started_at))}; "
+               f"percentiles cover the last {PERF_WINDOW} samples of each metric.")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Reruns", reruns)
+    col2.metric("Reruns / min", f"{reruns / uptime * 60:.1f}" if uptime else "–")
+    col3.metric("SQLite share of rerun time", f"{db_seconds / rerun_seconds:.0%}" if rerun_seconds else "–")
+    col4.metric("SQLite calls / rerun", f"{db_calls / reruns:.1f}" if reruns else "–")
+
+    sections = [
+        ("Script reruns (ms)", "rerun", 1000),
+        ("SQLite time per rerun (ms)", "rerun_db", 1000),
+        ("SQLite calls per rerun", "rerun_db_calls", 1),
+        ("Page renders (ms)", "page", 1000),
+        ("DB helpers (ms)", "db", 1000),
+    ]
+    for title, family, scale in sections:
+        rows = [
+            (label, count, *(quantiles[q] * scale for q in PERF_QUANTILES), top * scale)
+            for fam, label, count, _total, quantiles, top in snapshot if fam == family
+        ]
+        st.markdown(f"#### {title}")
+        if rows:
+            df = _pd().DataFrame(rows, columns=["Name", "Count", "p50", "p95", "p99", "Max"])
+            st.dataframe(df.round(2), use_container_width=True, hide_index=True)
+        else:
+            st.info("No samples yet.")
+
+    text = registry.prometheus_text()
+    st.download_button("Download metrics (Prometheus text)", text, file_name="career_app_metrics.prom",
+                       key="perf_download")
+    with st.expander("Prometheus text"):
+        st.code(text, language="text")
+    if st.button("Reset metrics", key="perf_reset"):
+        registry.reset()
+        st.rerun()
+
+if st.runtime.exists():
+    st.set_page_config(page_title="Career Navigator Pro", layout='wide', page_icon="🎓")
+    init_session_state()
+    start_cleanup_scheduler()
+    start_link_checker()
+    start_perf_textfile_writer()
+
+    with perf_rerun():
+        restore_session()
+        if st.session_state['logged_in']:
+            professional_app()
+        else:
+            with perf_page("Sign In"):
+                login_page()
+elif __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,481 @@
+"""Load test and benchmark for app.py.
+
+For every database size this seeds (or reuses) a users database and then:
+
+* drives N concurrent sessions through sign-in, profile edit and admin
+  listing with streamlit.testing AppTest, timing every rerun. AppTest is not
+  thread-safe, so each session runs in its own process;
+* calls the DB helpers directly from N threads sharing one connection pool,
+  timing each call;
+* collects the app's own fragment timings. AppTest always reruns the whole
+  script, so a slider move is timed both as that full rerun and as the
+  fragment body a browser session would rerun on its own;
+* (once per run) starts fresh interpreters under python -X importtime and
+  times the first render of the sign-in page, listing the slowest imports
+  and whether the database was opened;
+
+and writes latency percentiles and peak RSS to a JSON file that can be
+compared against a run from another commit:
+
+    python benchmark.py --sizes 1000 100000 1000000 --sessions 8
+    python benchmark.py --compare old.json bench_results.json
+    python benchmark.py --startup-only
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import career_core as core
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+BENCH_PASSWORD = "bench-password"
+SEED_CHUNK = 50000
+RERUN_TIMEOUT_S = 120
+DEFAULT_SIZES = (1000, 100000, 1000000)
+PERF_TEXTFILE_INTERVAL_S = 0.2
+STARTUP_RUNS = 5
+# Imports that should stay off the sign-in path.
+STARTUP_WATCHED = ("pandas", "numpy", "PIL")
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+PROM_LINE = re.compile(r'^career_app_fragment_seconds_(sum|count)\{fragment="([^"]+)"\} (\S+)$')
+PROM_RERUN_DB_SUM = re.compile(r'^career_app_rerun_db_(seconds|calls)_sum\{page="[^"]+"\} (\S+)$')
+# Steps that cannot be served without SQLite; zero calls means the app's
+# accounting is broken, not that the step is fast.
+DB_STEPS = ("sign_in", "profile_save", "admin_page", "admin_next_page", "admin_search")
+
+def bench_user_id(i):
+    return f"user{i:07d}@bench.test"
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+def summarize(samples):
+    """Return count and millisecond percentiles for a list of durations in seconds."""
+    ms = sorted(s * 1000 for s in samples)
+    if len(ms) > 1:
+        cuts = statistics.quantiles(ms, n=100, method="inclusive")
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = ms[0]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(p50, 3),
+        "p90_ms": round(p90, 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+# ============= SEEDING =============
+def seed_db(path, users):
+    """Create a database with users bench accounts plus "admin"; reuses a matching file."""
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            existing = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        except sqlite3.Error:
+            existing = None
+        conn.close()
+        if existing == users + 1:
+            return 0.0
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    started = time.perf_counter()
+    pool = core.ConnectionPool(path)
+    core.migrate_db(pool)
+    # Every account shares one hash so seeding does not pay the KDF cost,
+    # while sign-ins still verify against the configured hasher.
+    hashed = core.hash_password(BENCH_PASSWORD)
+    with pool.connection() as conn:
+        conn.execute("BEGIN")
+        for start in range(0, users, SEED_CHUNK):
+            conn.executemany(
+                "INSERT INTO users (method, user_id, password) VALUES ('email', ?, ?)",
+                ((bench_user_id(i), hashed) for i in range(start, min(users, start + SEED_CHUNK))),
+            )
+        conn.execute("INSERT INTO users (method, user_id, password) VALUES ('email', 'admin', ?)", (hashed,))
+        conn.commit()
+    pool.close()
+    return time.perf_counter() - started
+
+# ============= APPTEST SESSIONS =============
+def _rerun(timings, step, at, action):
+    started = time.perf_counter()
+    action()
+    timings[step].append(time.perf_counter() - started)
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].message}")
+
+def _button(at, label):
+    return next(button for button in at.button if button.label == label)
+
+def _text_input(at, label):
+    return next(widget for widget in at.text_input if widget.label == label)
+
+def read_fragment_totals(path):
+    """Return {fragment: [total seconds, runs]} from the app's Prometheus dump."""
+    totals = defaultdict(lambda: [0.0, 0])
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                match = PROM_LINE.match(line.strip())
+                if match:
+                    kind, name, value = match.groups()
+                    if kind == "sum":
+                        totals[name][0] += float(value)
+                    else:
+                        totals[name][1] += int(float(value))
+    except FileNotFoundError:
+        pass
+    return dict(totals)
+
+def read_rerun_db_totals(path, since_ns):
+    """Return (SQLite seconds, SQLite calls) of all reruns so far, from a dump rendered after since_ns."""
+    deadline = time.monotonic() + RERUN_TIMEOUT_S
+    first_seen = None
+    while True:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        # The first rewrite after since_ns may have been rendered just before
+        # it; the one after that is certain to include the rerun.
+        if mtime > since_ns and first_seen is None:
+            first_seen = mtime
+        elif first_seen is not None and mtime != first_seen:
+            break
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"the app stopped rewriting {path}")
+        time.sleep(PERF_TEXTFILE_INTERVAL_S / 4)
+    totals = {"seconds": 0.0, "calls": 0.0}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = PROM_RERUN_DB_SUM.match(line.strip())
+            if match:
+                totals[match.group(1)] += float(match.group(2))
+    return totals["seconds"], totals["calls"]
+
+def run_session(db_path, session, users, iterations, perf_dir):
+    """One simulated user: sign in, edit the profile, rate skills, then browse as admin."""
+    # career_core read its settings when this process imported it.
+    core.DB_PATH = db_path
+    # The app rewrites its metrics here, which is how fragment timings get out
+    # of the script run.
+    perf_path = os.path.join(perf_dir, f"session_{session}.prom")
+    core.PERF_TEXTFILE = perf_path
+    core.PERF_TEXTFILE_INTERVAL_S = PERF_TEXTFILE_INTERVAL_S
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session)
+    timings = defaultdict(list)
+    rerun_db = defaultdict(list)
+    db_seen = (0.0, 0.0)
+
+    def rerun(step, at, action):
+        nonlocal db_seen
+        _rerun(timings, step, at, action)
+        # SQLite time only leaves the app as running totals in its dump.
+        db_total = read_rerun_db_totals(perf_path, time.time_ns())
+        seconds, calls = (now - before for now, before in zip(db_total, db_seen))
+        db_seen = db_total
+        if step in DB_STEPS and not calls:
+            raise RuntimeError(f"{step}: the app recorded no SQLite calls for a step that needs the database")
+        rerun_db[step].append(seconds)
+
+    for i in range(iterations):
+        at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT_S)
+        rerun("login_page", at, at.run)
+        at.text_input(key="login_id_main").input(bench_user_id(rng.randrange(users)))
+        at.text_input(key="login_pass_main").input(BENCH_PASSWORD)
+        rerun("sign_in", at, lambda: at.button(key="signin_btn_main").click().run())
+        if not at.session_state["logged_in"]:
+            raise RuntimeError("sign_in: bench account was rejected")
+
+        rerun("profile_view", at, lambda: at.sidebar.radio(key="main_nav").set_value("Profile").run())
+        rerun("profile_edit_open", at, lambda: _button(at, "Edit Profile").click().run())
+        _text_input(at, "Name").input(f"Bench User {session}")
+        _text_input(at, "Username").input(f"bench-{session}-{i}-{os.getpid()}")
+        rerun("profile_save", at, lambda: _button(at, "💾 Save Changes").click().run())
+        rerun("career_path", at, lambda: at.sidebar.radio(key="main_nav").set_value("My Career Path").run())
+        slider = at.slider[rng.randrange(len(at.slider))]
+        rerun("career_slider", at, lambda: slider.set_value(rng.randrange(101)).run())
+        rerun("catalog_search", at, lambda: at.text_input(key="catalog_search").input("python").run())
+
+        at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT_S)
+        at.session_state["logged_in"] = True
+        at.session_state["user"] = "admin"
+        at.session_state["user_method"] = "email"
+        rerun("home", at, at.run)
+        rerun("admin_page", at, lambda: at.sidebar.radio(key="main_nav").set_value("Admin").run())
+        rerun("admin_next_page", at, lambda: at.button(key="admin_next_page").click().run())
+        at.text_input(key="admin_search").input(f"user{rng.randrange(100):02d}")
+        rerun("admin_search", at, at.run)
+    return dict(timings), dict(rerun_db), peak_rss_kb(), read_fragment_totals(perf_path)
+
+# ============= DIRECT DB LOAD =============
+def run_db_load(db_path, threads, users, iterations):
+    """Call the DB helpers from several threads sharing the app's connection pool."""
+    core.DB_PATH = db_path
+    core.get_pool()  # open and migrate outside the timed region
+    timings = defaultdict(list)
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = defaultdict(list)
+        calls = {
+            "login_user": lambda: core.login_user("email", bench_user_id(rng.randrange(users)), BENCH_PASSWORD),
+            "user_exists": lambda: core.user_exists("email", bench_user_id(rng.randrange(users))),
+            "fetch_profile": lambda: core.fetch_profile(bench_user_id(rng.randrange(users))),
+            "list_users": lambda: core.list_users(rng.randrange(users)),
+            "list_users_prefix": lambda: core.list_users(0, search=f"user{rng.randrange(100):02d}"),
+        }
+        for _ in range(iterations):
+            for name, call in calls.items():
+                started = time.perf_counter()
+                call()
+                local[name].append(time.perf_counter() - started)
+        with lock:
+            for name, samples in local.items():
+                timings[name].extend(samples)
+
+    pool_threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in pool_threads:
+        thread.start()
+    for thread in pool_threads:
+        thread.join()
+    return dict(timings), peak_rss_kb()
+
+# ============= STARTUP =============
+# Run in a fresh interpreter so every import is cold. AppTest executes the
+# script the way `streamlit run` does, after streamlit itself is loaded.
+STARTUP_SCRIPT = """
+import json, os, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+started = time.perf_counter()
+at.run()
+render = time.perf_counter() - started
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+print(json.dumps({
+    "first_render_s": render,
+    "login_rendered": any(b.key == "signin_btn_main" for b in at.button),
+    "db_opened": os.path.exists(os.environ["CAREER_APP_DB"]),
+    "loaded": [name for name in sys.argv[3].split(",") if name in sys.modules],
+}))
+"""
+
+def parse_importtime(stderr):
+    """Return {top-level import: cumulative seconds} from -X importtime output."""
+    imports = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # Nested imports are indented under the import that pulled them in and
+        # already counted in its cumulative time.
+        if match and match.group(3) == " ":
+            imports[match.group(4)] = int(match.group(2)) / 1e6
+    return imports
+
+def run_startup(db_dir):
+    """One cold start: process wall time, first sign-in render and import times."""
+    db_path = os.path.join(db_dir, "startup.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    env = dict(os.environ, CAREER_APP_DB=db_path, CAREER_APP_CLEANUP_INTERVAL="0")
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT, APP_PATH, str(RERUN_TIMEOUT_S),
+                           ",".join(STARTUP_WATCHED)],
+                          capture_output=True, text=True, env=env, cwd=db_dir)
+    wall = time.perf_counter() - started
+    if proc.returncode:
+        raise RuntimeError(f"startup run failed: {proc.stderr.strip().splitlines()[-1]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_s"] = wall
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+def bench_startup(db_dir, runs):
+    samples = [run_startup(db_dir) for _ in range(runs)]
+    imports = defaultdict(list)
+    for sample in samples:
+        for name, seconds in sample["imports"].items():
+            imports[name].append(seconds)
+    slowest = sorted(imports.items(), key=lambda item: -statistics.median(item[1]))[:10]
+    return {
+        "runs": runs,
+        "first_render": summarize([sample["first_render_s"] for sample in samples]),
+        "process": summarize([sample["wall_s"] for sample in samples]),
+        "login_rendered": all(sample["login_rendered"] for sample in samples),
+        "db_opened": any(sample["db_opened"] for sample in samples),
+        "watched_imports": {name: any(name in sample["loaded"] for sample in samples) for name in STARTUP_WATCHED},
+        "slowest_imports_ms": {name: round(statistics.median(seconds) * 1000, 1) for name, seconds in slowest},
+    }
+
+# ============= DRIVER =============
+def bench_size(ctx, db_dir, users, sessions, iterations):
+    db_path = os.path.join(db_dir, f"bench_{users}.db")
+    seed_seconds = seed_db(db_path, users)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as perf_dir, ctx.Pool(sessions, maxtasksperchild=1) as pool:
+        session_results = pool.starmap(run_session, [(db_path, s, users, iterations, perf_dir) for s in range(sessions)])
+    session_seconds = time.perf_counter() - started
+    with ctx.Pool(1) as pool:
+        db_timings, db_rss = pool.apply(run_db_load, (db_path, sessions, users, iterations * 10))
+
+    reruns = defaultdict(list)
+    rerun_db = defaultdict(list)
+    fragments = defaultdict(lambda: [0.0, 0])
+    for timings, db_samples, _rss, fragment_totals in session_results:
+        for step, samples in timings.items():
+            reruns[step].extend(samples)
+        for step, samples in db_samples.items():
+            rerun_db[step].extend(samples)
+        for name, (total, runs) in fragment_totals.items():
+            fragments[name][0] += total
+            fragments[name][1] += runs
+    session_rss = [rss for _timings, _db, rss, _fragments in session_results if rss is not None]
+    return {
+        "users": users,
+        "seed_seconds": round(seed_seconds, 3),
+        "session_seconds": round(session_seconds, 3),
+        "peak_rss_kb": {
+            "session": max(session_rss) if session_rss else None,
+            "db_load": db_rss,
+        },
+        "reruns": {step: summarize(samples) for step, samples in reruns.items()},
+        # SQLite time inside each of those reruns, as the app measured it.
+        "rerun_db": {step: summarize(samples) for step, samples in rerun_db.items()},
+        "db": {name: summarize(samples) for name, samples in db_timings.items()},
+        # Only totals leave the app, so fragments report a mean, not percentiles.
+        "fragments": {
+            name: {"count": runs, "mean_ms": round(total / runs * 1000, 3)}
+            for name, (total, runs) in sorted(fragments.items()) if runs
+        },
+    }
+
+def run_metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(APP_PATH), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import streamlit
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "password_hasher": core.DEFAULT_HASHER.spec,
+        "sessions": args.sessions,
+        "iterations": args.iterations,
+    }
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old_doc = json.load(f)
+    with open(new_path) as f:
+        new_doc = json.load(f)
+    old = {run["users"]: run for run in old_doc["results"]}
+    new = {run["users"]: run for run in new_doc["results"]}
+    print(f"{'users':>8} {'metric':<24} {'old p90':>10} {'new p90':>10} {'change':>8}")
+    if old_doc.get("startup") and new_doc.get("startup"):
+        for name in ("first_render", "process"):
+            before = old_doc["startup"][name]["p50_ms"]
+            after = new_doc["startup"][name]["p50_ms"]
+            print(f"{'-':>8} {'startup.' + name:<24} {before:>10.1f} {after:>10.1f} "
+                  f"{(after - before) / before:>+8.0%} (p50)")
+    for users in sorted(old.keys() & new.keys()):
+        for section in ("reruns", "rerun_db", "db"):
+            for name in sorted(old[users].get(section, {}).keys() & new[users].get(section, {}).keys()):
+                before = old[users][section][name]["p90_ms"]
+                after = new[users][section][name]["p90_ms"]
+                change = f"{(after - before) / before:+.0%}" if before else "n/a"
+                print(f"{users:>8} {section + '.' + name:<24} {before:>10.1f} {after:>10.1f} {change:>8}")
+        fragments = old[users].get("fragments", {}).keys() & new[users].get("fragments", {}).keys()
+        for name in sorted(fragments):
+            before = old[users]["fragments"][name]["mean_ms"]
+            after = new[users]["fragments"][name]["mean_ms"]
+            change = f"{(after - before) / before:+.0%}" if before else "n/a"
+            print(f"{users:>8} {'fragments.' + name:<24} {before:>10.1f} {after:>10.1f} {change:>8} (mean)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmark.py", description="Load-test app.py with concurrent sessions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="seeded user counts")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions (and DB load threads)")
+    parser.add_argument("--iterations", type=int, default=5, help="scenario repetitions per session")
+    parser.add_argument("--db-dir", default=os.path.join(tempfile.gettempdir(), "career_app_bench"),
+                        help="where seeded databases are kept between runs (default: %(default)s)")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file (default: %(default)s)")
+    parser.add_argument("--startup-runs", type=int, default=STARTUP_RUNS,
+                        help="cold starts to time; 0 skips the startup benchmark")
+    parser.add_argument("--startup-only", action="store_true", help="only run the startup benchmark")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="print p90 changes between two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    os.makedirs(args.db_dir, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    startup = None
+    if args.startup_runs > 0:
+        print(f"Timing {args.startup_runs} cold start(s)...", file=sys.stderr)
+        startup = bench_startup(args.db_dir, args.startup_runs)
+    results = []
+    for users in [] if args.startup_only else args.sizes:
+        print(f"Benchmarking {users} users with {args.sessions} sessions...", file=sys.stderr)
+        results.append(bench_size(ctx, args.db_dir, users, args.sessions, args.iterations))
+    with open(args.out, "w") as f:
+        json.dump({"meta": run_metadata(args), "startup": startup, "results": results}, f, indent=2)
+    if startup:
+        print(f"startup: first sign-in render p50 {startup['first_render']['p50_ms']:.1f} ms, "
+              f"process p50 {startup['process']['p50_ms']:.1f} ms")
+        loaded = [name for name, seen in startup["watched_imports"].items() if seen]
+        print(f"  loaded before sign-in: {', '.join(loaded) or 'none of ' + ', '.join(STARTUP_WATCHED)}; "
+              f"database {'opened' if startup['db_opened'] else 'not opened'}")
+        for name, ms in startup["slowest_imports_ms"].items():
+            print(f"  {'import ' + name:<48} {ms:>8.1f} ms")
+    for run in results:
+        print(f"{run['users']} users:")
+        for section in ("reruns", "rerun_db", "db"):
+            for name, stats in run[section].items():
+                print(f"  {section + '.' + name:<24} p50 {stats['p50_ms']:>8.1f} ms  p90 {stats['p90_ms']:>8.1f} ms"
+                      f"  p99 {stats['p99_ms']:>8.1f} ms")
+        for name, stats in run["fragments"].items():
+            print(f"  {'fragments.' + name:<24} mean {stats['mean_ms']:>7.1f} ms  ({stats['count']} runs)")
+        if "career_slider" in run["reruns"] and "career_readiness" in run["fragments"]:
+            full = run["reruns"]["career_slider"]["mean_ms"]
+            print(f"  slider move: full rerun {full:.1f} ms, fragment rerun "
+                  f"{run['fragments']['career_readiness']['mean_ms']:.1f} ms")
+    print(f"Results written to {args.out}.", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
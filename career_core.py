@@ -0,0 +1,2750 @@
+"""Storage, accounts, sessions, sign-in throttling, instrumentation and
+background jobs behind app.py.
+
+Streamlit re-executes app.py on every rerun; this module is imported once per
+process, so its classes, caches and thread-locals stay the same objects
+across reruns and sessions.
+"""
+import streamlit as st
+import argparse
+import asyncio
+import atexit
+import base64
+import bisect
+import csv
+import functools
+import json
+import sqlite3
+import hashlib
+import hmac
+import os
+import queue
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.client import HTTPException
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, quote_plus, urlsplit
+from urllib.request import Request, urlopen
+
+# pandas and numpy take most of a cold start and the sign-in page needs
+# neither, so they are imported on first use through these.
+def _np():
+    import numpy
+    return numpy
+
+def _pd():
+    import pandas
+    return pandas
+
+# ============= DATABASE CONNECTIONS =============
+DB_PATH = os.environ.get("CAREER_APP_DB", "users.db")
+DB_POOL_SIZE = int(os.environ.get("CAREER_APP_DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = 5000
+# Extra PRAGMAs applied to every connection, e.g. "cache_size=-20000,mmap_size=268435456".
+DB_PRAGMAS = os.environ.get("CAREER_APP_DB_PRAGMAS", "")
+# Optional read-only copy of the database (a LiteFS/Litestream replica, for
+# instance) that serves admin listings, counts and exports.
+DB_READ_REPLICA = os.environ.get("CAREER_APP_DB_READ_REPLICA", "")
+# Where accounts live: "sqlite" (DB_PATH) or "memory" (per process, lost on restart).
+USER_STORE = os.environ.get("CAREER_APP_USER_STORE", "sqlite")
+ADMIN_PAGE_SIZE = int(os.environ.get("CAREER_APP_ADMIN_PAGE_SIZE", "50"))
+# Seconds between background purges of expired sessions and lockouts; 0 disables them.
+CLEANUP_INTERVAL_S = int(os.environ.get("CAREER_APP_CLEANUP_INTERVAL", "3600"))
+PROFILE_CACHE_TTL_S = int(os.environ.get("CAREER_APP_PROFILE_CACHE_TTL", "300"))
+PROFILE_CACHE_SIZE = int(os.environ.get("CAREER_APP_PROFILE_CACHE_SIZE", "10000"))
+AVATAR_DIR = os.environ.get("CAREER_APP_AVATAR_DIR", "profile_avatars")
+FEEDBACK_FLUSH_INTERVAL_S = float(os.environ.get("CAREER_APP_FEEDBACK_FLUSH_INTERVAL", "1.0"))
+FEEDBACK_MAX_PENDING = int(os.environ.get("CAREER_APP_FEEDBACK_MAX_PENDING", "10000"))
+# Rows the database refused, kept for the admin page.
+FEEDBACK_DEAD_LETTERS = 100
+CATALOG_PATH = os.environ.get(
+    "CAREER_APP_CATALOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "career_catalog.json"))
+SESSION_TTL_S = int(os.environ.get("CAREER_APP_SESSION_TTL", str(12 * 3600)))
+SESSION_CACHE_SIZE = int(os.environ.get("CAREER_APP_SESSION_CACHE_SIZE", "10000"))
+# Seconds a rotated-away session token can still open a new tab.
+SESSION_ROTATE_GRACE_S = int(os.environ.get("CAREER_APP_SESSION_ROTATE_GRACE", "60"))
+# Failed sign-ins allowed per account within LOGIN_FAILURE_WINDOW_S before it is locked.
+LOGIN_MAX_FAILURES = int(os.environ.get("CAREER_APP_LOGIN_MAX_FAILURES", "5"))
+LOGIN_FAILURE_WINDOW_S = int(os.environ.get("CAREER_APP_LOGIN_FAILURE_WINDOW", "900"))
+LOGIN_LOCKOUT_S = int(os.environ.get("CAREER_APP_LOGIN_LOCKOUT", "900"))
+# Sign-in and reset attempts allowed per client address per minute.
+LOGIN_CLIENT_LIMIT = int(os.environ.get("CAREER_APP_LOGIN_CLIENT_LIMIT", "30"))
+# Reverse proxies in front of the app that append to X-Forwarded-For. Clients
+# can send that header themselves, so it is only read when this is set.
+TRUSTED_PROXIES = int(os.environ.get("CAREER_APP_TRUSTED_PROXIES", "0"))
+PERF_ENABLED = os.environ.get("CAREER_APP_PERF", "1") != "0"
+# When set, the Prometheus text dump is rewritten here periodically (for a
+# node_exporter textfile collector, for instance).
+PERF_TEXTFILE = os.environ.get("CAREER_APP_PERF_TEXTFILE", "")
+
+def parse_pragmas(text):
+    """Parse "name=value,..." into pairs, refusing anything but plain names and values."""
+    pragmas = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = item.partition("=")
+        if not re.fullmatch(r"\w+", name) or not re.fullmatch(r"-?\w+", value):
+            raise ValueError(f"bad PRAGMA setting {item!r}")
+        pragmas.append((name, value))
+    return pragmas
+
+class ConnectionPool:
+    """A small pool of long-lived SQLite connections shared by every session.
+
+    Streamlit runs each rerun on a fresh thread, so connections are checked out
+    and returned instead of being bound to a thread. Keeping them open lets
+    sqlite3's per-connection statement cache reuse prepared statements.
+    """
+
+    def __init__(self, path, size=DB_POOL_SIZE, busy_timeout_ms=DB_BUSY_TIMEOUT_MS, pragmas=DB_PRAGMAS, read_only=False):
+        self.path = path
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.pragmas = parse_pragmas(pragmas)
+        self.read_only = read_only
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            f"file:{quote(self.path)}?mode=ro" if self.read_only else self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+            uri=self.read_only,
+        )
+        if not self.read_only:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    self._created -= 1
+                    raise
+        # Every connection is checked out: wait as long as SQLite would for a
+        # lock, then fail the way a busy database does.
+        try:
+            return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"all {self.size} database connections are busy; gave up after {self.busy_timeout_ms} ms") from None
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+@st.cache_resource
+def _open_pool(path):
+    pool = ConnectionPool(path)
+    # Schema changes are applied once per process, when the pool is created,
+    # so ordinary reruns never issue DDL.
+    migrate_db(pool)
+    return pool
+
+@st.cache_resource
+def _open_read_pool(path):
+    return ConnectionPool(path, read_only=True)
+
+def get_pool(path=None):
+    return _open_pool(path or DB_PATH)
+
+def db_query(sql, params=(), one=False, pool=None):
+    started = time.perf_counter()
+    with (pool or get_pool()).connection() as conn:
+        cur = conn.execute(sql, params)
+        result = cur.fetchone() if one else cur.fetchall()
+    _count_db_call(started)
+    return result
+
+def db_execute(sql, params=(), pool=None):
+    started = time.perf_counter()
+    with (pool or get_pool()).connection() as conn:
+        rowcount = conn.execute(sql, params).rowcount
+    _count_db_call(started)
+    return rowcount
+
+@contextmanager
+def db_transaction(pool=None):
+    """Run several statements atomically; yields the checked-out connection."""
+    started = time.perf_counter()
+    with (pool or get_pool()).connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    _count_db_call(started)
+
+# ============= INSTRUMENTATION =============
+PERF_WINDOW = 2048  # most recent samples kept per metric for the rolling quantiles
+PERF_QUANTILES = (0.5, 0.95, 0.99)
+PERF_TEXTFILE_INTERVAL_S = float(os.environ.get("CAREER_APP_PERF_TEXTFILE_INTERVAL", "15"))
+# family -> (Prometheus metric name, label name, help text)
+PERF_FAMILIES = {
+    "db": ("career_app_db_helper_seconds", "helper", "Time spent in each DB helper."),
+    "page": ("career_app_page_render_seconds", "page", "Time spent rendering each page."),
+    "rerun": ("career_app_rerun_seconds", "page", "Wall time of each script rerun."),
+    "rerun_db": ("career_app_rerun_db_seconds", "page", "SQLite time within each script rerun."),
+    "rerun_db_calls": ("career_app_rerun_db_calls", "page", "SQLite calls made by each script rerun."),
+    "fragment": ("career_app_fragment_seconds", "fragment", "Time spent running each fragment."),
+}
+
+class Metric:
+    __slots__ = ("samples", "count", "total")
+
+    def __init__(self):
+        self.samples = deque(maxlen=PERF_WINDOW)
+        self.count = 0
+        self.total = 0.0
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in PERF_QUANTILES}
+
+class PerfRegistry:
+    """Process-wide metrics keyed by (family, label).
+
+    Quantiles are computed over the last PERF_WINDOW samples, so they follow
+    current behaviour; count and total cover the whole process lifetime.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, family, label, value):
+        with self._lock:
+            metric = self._metrics.get((family, label))
+            if metric is None:
+                metric = self._metrics[(family, label)] = Metric()
+            metric.samples.append(value)
+            metric.count += 1
+            metric.total += value
+
+    def snapshot(self):
+        """Return [(family, label, count, total, {quantile: value}, max)] sorted by family and label."""
+        with self._lock:
+            return [
+                (family, label, m.count, m.total, m.quantiles(), max(m.samples))
+                for (family, label), m in sorted(self._metrics.items())
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self.started_at = time.time()
+
+    def prometheus_text(self):
+        def escape(value):
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        lines = []
+        snapshot = self.snapshot()
+        for family, (name, label_name, help_text) in PERF_FAMILIES.items():
+            rows = [row for row in snapshot if row[0] == family]
+            if not rows:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+            for _family, label, count, total, quantiles, _max in rows:
+                labels = f'{label_name}="{escape(label)}"'
+                for q, value in quantiles.items():
+                    lines.append(f'{name}{{{labels},quantile="{q}"}} {value:.6g}')
+                lines.append(f"{name}_sum{{{labels}}} {total:.6g}")
+                lines.append(f"{name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+@st.cache_resource
+def get_perf_registry():
+    return PerfRegistry()
+
+@dataclass
+class RerunStats:
+    registry: PerfRegistry
+    page: str = ""
+    db_calls: int = 0
+    db_seconds: float = 0.0
+
+# Holds the RerunStats of the rerun running on this thread, if any.
+_perf_local = threading.local()
+
+def _count_db_call(started):
+    rerun = getattr(_perf_local, "rerun", None)
+    if rerun is not None:
+        rerun.db_calls += 1
+        rerun.db_seconds += time.perf_counter() - started
+
+def perf_observe(family, label, value):
+    rerun = getattr(_perf_local, "rerun", None)
+    (rerun.registry if rerun is not None else get_perf_registry()).observe(family, label, value)
+
+def perf_timed(family="db", label=None):
+    """Decorator recording each call's duration; a no-op when instrumentation is off."""
+    def decorate(fn):
+        if not PERF_ENABLED:
+            return fn
+        name = label or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                perf_observe(family, name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+@contextmanager
+def perf_page(page):
+    """Time a page render and name the current rerun after it."""
+    if not PERF_ENABLED:
+        yield
+        return
+    rerun = getattr(_perf_local, "rerun", None)
+    if rerun is not None:
+        rerun.page = page
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        perf_observe("page", page, time.perf_counter() - started)
+
+@contextmanager
+def perf_rerun():
+    """Record wall time, SQLite time and SQLite calls for one script rerun."""
+    if not PERF_ENABLED:
+        yield
+        return
+    rerun = _perf_local.rerun = RerunStats(get_perf_registry())
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        # st.rerun() and st.stop() raise through here; the partial run still counts.
+        _perf_local.rerun = None
+        page = rerun.page or "unknown"
+        rerun.registry.observe("rerun", page, time.perf_counter() - started)
+        rerun.registry.observe("rerun_db", page, rerun.db_seconds)
+        rerun.registry.observe("rerun_db_calls", page, rerun.db_calls)
+
+def perf_fragment(fn):
+    """st.fragment that also records how long each run of the fragment takes.
+
+    Widgets inside a fragment rerun only the fragment, so those runs never pass
+    through perf_rerun(); this is where their cost shows up.
+    """
+    if not PERF_ENABLED:
+        return st.fragment(fn)
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            perf_observe("fragment", fn.__name__, time.perf_counter() - started)
+    return st.fragment(timed)
+
+@st.cache_resource
+def start_perf_textfile_writer(path=None, interval=None):
+    """Rewrite the Prometheus dump at path (PERF_TEXTFILE) every interval seconds; returns the stop event."""
+    path = path or PERF_TEXTFILE
+    interval = interval or PERF_TEXTFILE_INTERVAL_S
+    if not (PERF_ENABLED and path):
+        return None
+    stop = threading.Event()
+    registry = get_perf_registry()
+
+    def run():
+        while not stop.wait(interval):
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(registry.prometheus_text())
+                os.replace(tmp_path, path)
+            except OSError:
+                pass  # try again next interval
+
+    threading.Thread(target=run, name="perf-textfile", daemon=True).start()
+    return stop
+
+# ============= SCHEMA MIGRATIONS =============
+PROFILE_COLUMNS = ("name", "username", "pronouns", "bio", "links", "avatar")
+
+def _migration_001_users(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        method TEXT NOT NULL,
+        user_id TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL
+    )
+    ''')
+    # Databases created before migrations existed may already have some of
+    # the profile columns.
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+    for column in PROFILE_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE users ADD COLUMN {column} TEXT")
+
+# Holds every column the profile read selects, so it is answered from the
+# index alone. bio and links are free text and make the index larger, but
+# without them each read would go back to the table row.
+PROFILE_INDEX_COLUMNS = "user_id, name, username, pronouns, bio, links, avatar"
+
+def _create_user_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_method_user_id ON users (method, user_id)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_users_profile ON users ({PROFILE_INDEX_COLUMNS})")
+
+# Set by `migrate --clear-duplicate-usernames`; see _migration_002_lookup_indexes.
+CLEAR_DUPLICATE_USERNAMES = False
+
+def _migration_002_lookup_indexes(conn):
+    # Usernames become unique. Blank ones are stored as NULL. Duplicates need
+    # a decision, so they are listed and the migration stops, unless the
+    # operator asked for only the oldest account to keep each name.
+    conn.execute("UPDATE users SET username=NULL WHERE trim(username)=''")
+    duplicates = conn.execute('''
+        SELECT id, user_id, username FROM users
+        WHERE username IS NOT NULL
+          AND id NOT IN (SELECT MIN(id) FROM users WHERE username IS NOT NULL GROUP BY username)
+        ORDER BY username, id
+    ''').fetchall()
+    if duplicates and not CLEAR_DUPLICATE_USERNAMES:
+        listing = "; ".join(f"{user_id} ({username!r})" for _id, user_id, username in duplicates[:20])
+        raise RuntimeError(
+            f"{len(duplicates)} account(s) reuse a username an older account already has: {listing}. "
+            "Rename them, or run `python app.py migrate --clear-duplicate-usernames` to clear those usernames.")
+    for row_id, user_id, username in duplicates:
+        print(f"Cleared duplicate username {username!r} from {user_id} (id {row_id}).", file=sys.stderr)
+    conn.executemany("UPDATE users SET username=NULL WHERE id=?", [(row[0],) for row in duplicates])
+    _create_user_indexes(conn)
+
+def _migration_003_reject_empty_credentials(conn):
+    # SQLite cannot add a CHECK constraint to an existing table, so the table
+    # is rebuilt; rows that would violate it are dropped on the way.
+    conn.execute('''
+    CREATE TABLE users_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        method TEXT NOT NULL,
+        user_id TEXT UNIQUE NOT NULL CHECK (trim(user_id) <> ''),
+        password TEXT NOT NULL CHECK (password <> ''),
+        name TEXT,
+        username TEXT,
+        pronouns TEXT,
+        bio TEXT,
+        links TEXT,
+        avatar TEXT
+    )
+    ''')
+    columns = ", ".join(("id", "method", "user_id", "password") + PROFILE_COLUMNS)
+    conn.execute(f"INSERT INTO users_new ({columns}) SELECT {columns} FROM users WHERE trim(user_id) <> '' AND password <> ''")
+    conn.execute("DROP TABLE users")
+    conn.execute("ALTER TABLE users_new RENAME TO users")
+    _create_user_indexes(conn)
+
+def _migration_004_feedback(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS feedback (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        message TEXT NOT NULL CHECK (trim(message) <> ''),
+        created_at REAL NOT NULL
+    )
+    ''')
+
+def _migration_005_skill_ratings(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS skill_ratings (
+        user_id TEXT NOT NULL,
+        skill TEXT NOT NULL,
+        confidence INTEGER NOT NULL CHECK (confidence BETWEEN 0 AND 100),
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (user_id, skill)
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_006_assessments(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS assessments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        score REAL NOT NULL CHECK (score BETWEEN 0 AND 100),
+        ratings TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assessments_user_domain ON assessments(user_id, domain, id)")
+    # Rollups kept up to date by record_assessment() in the same transaction.
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS assessment_latest (
+        user_id TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        score REAL NOT NULL,
+        previous_score REAL,
+        first_score REAL NOT NULL,
+        assessments INTEGER NOT NULL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (user_id, domain)
+    ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS assessment_cohort (
+        domain TEXT PRIMARY KEY,
+        users INTEGER NOT NULL,
+        score_sum REAL NOT NULL,
+        job_ready INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS assessment_daily (
+        day TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        assessments INTEGER NOT NULL,
+        score_sum REAL NOT NULL,
+        PRIMARY KEY (day, domain)
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_007_sessions(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        method TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS app_secrets (
+        name TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_008_login_lockouts(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS login_lockouts (
+        account TEXT PRIMARY KEY,
+        locked_until REAL NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_009_link_status(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS link_status (
+        url TEXT PRIMARY KEY,
+        status INTEGER,
+        ok INTEGER NOT NULL,
+        error TEXT NOT NULL DEFAULT '',
+        etag TEXT,
+        last_modified TEXT,
+        final_url TEXT,
+        failures INTEGER NOT NULL DEFAULT 0,
+        elapsed_ms REAL NOT NULL,
+        checked_at REAL NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_010_narrow_profile_index(conn):
+    conn.execute("DROP INDEX IF EXISTS idx_users_profile")
+    _create_user_indexes(conn)
+
+def _migration_011_covering_profile_index(conn):
+    # Migration 10 left out bio and links, so the index stopped covering
+    # the profile read.
+    conn.execute("DROP INDEX IF EXISTS idx_users_profile")
+    _create_user_indexes(conn)
+
+def _migration_012_session_families(conn):
+    # Rotation keeps the old token, marked replaced; family is the token hash
+    # of the sign-in every rotated token descends from.
+    conn.execute("ALTER TABLE sessions ADD COLUMN replaced_at REAL")
+    conn.execute("ALTER TABLE sessions ADD COLUMN family TEXT")
+    conn.execute("UPDATE sessions SET family=token_hash")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_family ON sessions(family)")
+
+# (version, description, apply) — append only, never renumber.
+MIGRATIONS = [
+    (1, "users table with profile columns", _migration_001_users),
+    (2, "lookup indexes and unique usernames", _migration_002_lookup_indexes),
+    (3, "reject empty user_id/password with CHECK constraints", _migration_003_reject_empty_credentials),
+    (4, "feedback table", _migration_004_feedback),
+    (5, "per-user skill confidence ratings", _migration_005_skill_ratings),
+    (6, "assessment history with per-user, cohort and daily rollups", _migration_006_assessments),
+    (7, "login sessions and app secrets", _migration_007_sessions),
+    (8, "persisted login lockouts", _migration_008_login_lockouts),
+    (9, "cached catalog link health", _migration_009_link_status),
+    (10, "profile index without bio and links", _migration_010_narrow_profile_index),
+    (11, "profile index covering the profile read again", _migration_011_covering_profile_index),
+    (12, "rotated session tokens stay valid for already signed-in tabs", _migration_012_session_families),
+]
+
+@st.cache_resource
+def _migration_lock():
+    return threading.Lock()
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate_db(pool):
+    """Apply pending migrations in order and return the versions applied.
+
+    Each migration runs in its own IMMEDIATE transaction together with the
+    user_version bump, so concurrent processes cannot apply the same step twice.
+    """
+    applied = []
+    with _migration_lock(), pool.connection() as conn:
+        if schema_version(conn) >= MIGRATIONS[-1][0]:
+            return applied
+        for version, _description, apply in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if schema_version(conn) >= version:
+                    conn.rollback()
+                    continue
+                apply(conn)
+                conn.execute(f"PRAGMA user_version={version}")
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            applied.append(version)
+    return applied
+
+# ============= PASSWORD HASHING =============
+# Hashes are stored as "$<hasher>$<k=v,...>$<salt>$<digest>" so every row
+# records the algorithm and cost it was made with. Bare 64-character hex
+# digests are legacy unsalted SHA-256 and are upgraded on the next login.
+PASSWORD_HASHER = os.environ.get("CAREER_APP_PASSWORD_HASHER", "scrypt:n=16384,r=8,p=1")
+HASH_WORKERS = int(os.environ.get("CAREER_APP_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Bulk imports hash on a pool of their own, so a large file never queues
+# ahead of interactive sign-ins.
+IMPORT_HASH_WORKERS = int(os.environ.get("CAREER_APP_IMPORT_HASH_WORKERS", str(max(1, HASH_WORKERS // 2))))
+SALT_BYTES = 16
+BENCH_HASHER_SPECS = (
+    "scrypt:n=8192,r=8,p=1",
+    "scrypt:n=16384,r=8,p=1",
+    "scrypt:n=32768,r=8,p=1",
+    "pbkdf2-sha256:i=300000",
+    "pbkdf2-sha256:i=600000",
+)
+
+def _b64encode(raw):
+    return base64.b64encode(raw).decode().rstrip("=")
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+def _parse_params(text):
+    return {key: int(value) for key, value in (item.split("=", 1) for item in text.split(",") if item)}
+
+class KdfHasher(ABC):
+    """Base class for salted key-derivation hashers; subclasses set name,
+    defaults and derive()."""
+
+    name = None
+    defaults = {}
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"unknown {self.name} parameter(s): {', '.join(sorted(unknown))}")
+        self.params = {key: int(params.get(key, value)) for key, value in self.defaults.items()}
+
+    @property
+    def spec(self):
+        return f"{self.name}:" + ",".join(f"{key}={value}" for key, value in self.params.items())
+
+    @staticmethod
+    @abstractmethod
+    def derive(password, salt, params):
+        """Return the raw digest of password for salt and cost params."""
+
+    def hash(self, password):
+        salt = os.urandom(SALT_BYTES)
+        params = ",".join(f"{key}={value}" for key, value in self.params.items())
+        digest = self.derive(password, salt, self.params)
+        return f"${self.name}${params}${_b64encode(salt)}${_b64encode(digest)}"
+
+class ScryptHasher(KdfHasher):
+    name = "scrypt"
+    defaults = {"n": 16384, "r": 8, "p": 1}
+
+    @staticmethod
+    def derive(password, salt, params):
+        n, r, p = params["n"], params["r"], params["p"]
+        # OpenSSL refuses to run unless maxmem covers the 128*n*r working set.
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=128 * r * (n + p + 2) + 1024 * 1024, dklen=32)
+
+class Pbkdf2Hasher(KdfHasher):
+    name = "pbkdf2-sha256"
+    defaults = {"i": 600000}
+
+    @staticmethod
+    def derive(password, salt, params):
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, params["i"])
+
+HASHERS = {cls.name: cls for cls in (ScryptHasher, Pbkdf2Hasher)}
+
+def make_hasher(spec):
+    """Build a hasher from a spec such as "scrypt:n=16384,r=8,p=1"."""
+    name, _, params = spec.partition(":")
+    if name not in HASHERS:
+        raise ValueError(f"unknown password hasher {name!r}; choose from {', '.join(HASHERS)}")
+    return HASHERS[name](**_parse_params(params))
+
+DEFAULT_HASHER = make_hasher(PASSWORD_HASHER)
+
+def hash_password(password):
+    return DEFAULT_HASHER.hash(password)
+
+def check_password(password, encoded):
+    """Return (matches, needs_rehash) for a stored hash in any supported format."""
+    if not encoded.startswith("$"):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(encoded, legacy), True
+    try:
+        _, name, params, salt, digest = encoded.split("$")
+        params = _parse_params(params)
+        matches = hmac.compare_digest(HASHERS[name].derive(password, _b64decode(salt), params), _b64decode(digest))
+    except (KeyError, ValueError):
+        return False, False
+    return matches, (name, params) != (DEFAULT_HASHER.name, DEFAULT_HASHER.params)
+
+@st.cache_resource
+def get_hash_executor():
+    return ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="hash")
+
+@st.cache_resource
+def get_import_hash_executor():
+    return ThreadPoolExecutor(max_workers=IMPORT_HASH_WORKERS, thread_name_prefix="import-hash")
+
+@st.cache_resource
+def _dummy_password_hash():
+    return hash_password(secrets.token_urlsafe())
+
+def run_hash_job(fn, *args):
+    """Run a KDF call in the shared hash pool.
+
+    The pool bounds how many expensive hashes run at once across all sessions,
+    which caps CPU and scrypt memory under a burst of logins. The calling
+    script thread still blocks on the result until the hash is done.
+    """
+    return get_hash_executor().submit(fn, *args).result()
+
+def benchmark_hasher(spec, seconds=1.0):
+    """Return (ms per hash, hashes/sec on one thread, hashes/sec through the hash pool)."""
+    hasher = make_hasher(spec)
+    done, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        hasher.hash("benchmark-password")
+        done += 1
+    serial = done / (time.perf_counter() - started)
+    executor = get_hash_executor()
+    done, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        list(executor.map(hasher.hash, ["benchmark-password"] * HASH_WORKERS))
+        done += HASH_WORKERS
+    pooled = done / (time.perf_counter() - started)
+    return 1000 / serial, serial, pooled
+
+# ============= USER STORE =============
+# Every account read and write goes through a UserStore, so the backend can be
+# swapped without touching the helpers below. Backends accept batches
+# (add_users, existing_user_ids, export_page) so bulk work stays chunked.
+USER_METHODS = ("email", "phone")
+
+def validate_credentials(method, user_id, password):
+    """Return (method, stripped user_id, password) or raise ValueError with the reason."""
+    for name, value in (("method", method), ("user_id", user_id), ("password", password)):
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{name} must be text")
+    user_id = (user_id or "").strip()
+    if method not in USER_METHODS:
+        raise ValueError(f"method must be one of {', '.join(USER_METHODS)}")
+    if not user_id:
+        raise ValueError("missing user_id")
+    if not password:
+        raise ValueError("missing password")
+    return method, user_id, password
+
+# Lookup statements live in constants so check_query_plans() verifies
+# exactly what SqliteUserStore runs.
+SQL_LOGIN = "SELECT id, method, user_id, password FROM users WHERE method=? AND user_id=?"
+SQL_USER_EXISTS = "SELECT 1 FROM users WHERE method=? AND user_id=?"
+SQL_UPDATE_PASSWORD = "UPDATE users SET password=? WHERE method=? AND user_id=?"
+# Only replaces the hash that was just verified, so a concurrent password
+# change is never overwritten by a rehash.
+SQL_REHASH_PASSWORD = "UPDATE users SET password=? WHERE id=? AND password=?"
+# The planner would otherwise pick the UNIQUE(user_id) index and then read the
+# table row; idx_users_profile covers every selected column.
+SQL_FETCH_PROFILE = "SELECT name, username, pronouns, bio, links, avatar FROM users INDEXED BY idx_users_profile WHERE user_id=?"
+SQL_UPDATE_PROFILE = '''
+    UPDATE users
+    SET name=?, username=?, pronouns=?, bio=?, links=?, avatar=?
+    WHERE user_id=?
+'''
+SQL_INSERT_USER = "INSERT INTO users (method, user_id, password) VALUES (?, ?, ?)"
+SQL_DELETE_USER = "DELETE FROM users WHERE user_id=?"
+
+def _user_filter(search="", method=None, match="prefix"):
+    clauses, params = [], []
+    if search:
+        if match == "prefix":
+            # A range on user_id can use the UNIQUE index; LIKE 'x%' cannot,
+            # because SQLite's LIKE is case-insensitive by default.
+            clauses.append("user_id >= ? AND user_id < ?")
+            params += [search, search + "\U0010ffff"]
+        else:
+            clauses.append("instr(user_id, ?) > 0")
+            params.append(search)
+    if method:
+        clauses.append("method=?")
+        params.append(method)
+    return clauses, params
+
+def _user_page_key(search="", match="prefix"):
+    # Prefix searches are ordered by user_id, so the page is read straight off
+    # the UNIQUE(user_id) index range. user_id is unique, so it alone (with the
+    # rowid the index entry carries) orders the rows. Other listings go by id.
+    return "user_id" if search and match == "prefix" else "id"
+
+def user_page_cursor(row, search="", match="prefix"):
+    """The list_users cursor that continues after an (id, method, user_id) row."""
+    return row[2] if _user_page_key(search, match) == "user_id" else row[0]
+
+def _user_page_query(after=0, limit=ADMIN_PAGE_SIZE, search="", method=None, match="prefix"):
+    key = _user_page_key(search, match)
+    clauses, params = _user_filter(search, method, match)
+    if after:
+        clauses.insert(0, f"{key} > ?")
+        params.insert(0, after)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT id, method, user_id FROM users{where} ORDER BY {key} LIMIT ?", (*params, limit)
+
+class UsernameTaken(Exception):
+    """Raised by UserStore.update_profile when another account has the username."""
+
+class UserStore(ABC):
+    """Interface shared by the account backends. Rows are tuples:
+
+    find_login -> (id, method, user_id, password hash)
+    get_profile -> (name, username, pronouns, bio, links, avatar)
+    list_users -> [(id, method, user_id)], after a user_page_cursor();
+    export_page -> [EXPORT_COLUMNS values]
+    """
+    name = ""
+
+    @abstractmethod
+    def find_login(self, method, user_id):
+        ...
+
+    @abstractmethod
+    def exists(self, method, user_id):
+        ...
+
+    @abstractmethod
+    def add_user(self, method, user_id, password_hash):
+        """Insert one account; False if the user_id is taken."""
+
+    @abstractmethod
+    def add_users(self, rows):
+        """Insert (method, user_id, hash) rows atomically; returns the user_ids skipped as taken."""
+
+    @abstractmethod
+    def existing_user_ids(self, user_ids):
+        ...
+
+    @abstractmethod
+    def set_password(self, method, user_id, password_hash):
+        ...
+
+    @abstractmethod
+    def replace_password(self, row_id, old_hash, new_hash):
+        """Swap the hash only if it is still old_hash; returns whether it did."""
+
+    @abstractmethod
+    def get_profile(self, user_id):
+        ...
+
+    @abstractmethod
+    def update_profile(self, user_id, profile):
+        """Store a get_profile-shaped tuple; raises UsernameTaken."""
+
+    @abstractmethod
+    def delete_user(self, user_id, conn=None):
+        """Delete one account; returns how many were deleted.
+
+        conn is an open transaction on the app database for SQLite-backed
+        stores to delete in, so the caller's own deletes commit with it.
+        """
+
+    @abstractmethod
+    def list_users(self, after=0, limit=ADMIN_PAGE_SIZE, search="", method=None, match="prefix"):
+        ...
+
+    @abstractmethod
+    def count_users(self, search="", method=None, match="prefix"):
+        ...
+
+    @abstractmethod
+    def export_page(self, after_id, limit):
+        ...
+
+    @abstractmethod
+    def avatars_in_use(self):
+        ...
+
+class SqliteUserStore(UserStore):
+    """Accounts in the users table. Listings, counts and exports go to read_pool when given."""
+    name = "sqlite"
+
+    def __init__(self, pool, read_pool=None):
+        self.pool = pool
+        self.read_pool = read_pool or pool
+
+    def find_login(self, method, user_id):
+        return db_query(SQL_LOGIN, (method, user_id), one=True, pool=self.pool)
+
+    def exists(self, method, user_id):
+        return db_query(SQL_USER_EXISTS, (method, user_id), one=True, pool=self.pool) is not None
+
+    def add_user(self, method, user_id, password_hash):
+        try:
+            db_execute(SQL_INSERT_USER, (method, user_id, password_hash), pool=self.pool)
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def add_users(self, rows):
+        with db_transaction(self.pool) as conn:
+            taken = _existing_user_ids(conn, [user_id for _, user_id, _ in rows])
+            conn.executemany(SQL_INSERT_USER, [row for row in rows if row[1] not in taken])
+        return [user_id for _, user_id, _ in rows if user_id in taken]
+
+    def existing_user_ids(self, user_ids):
+        with self.pool.connection() as conn:
+            return _existing_user_ids(conn, user_ids)
+
+    def set_password(self, method, user_id, password_hash):
+        return db_execute(SQL_UPDATE_PASSWORD, (password_hash, method, user_id), pool=self.pool)
+
+    def replace_password(self, row_id, old_hash, new_hash):
+        return db_execute(SQL_REHASH_PASSWORD, (new_hash, row_id, old_hash), pool=self.pool) > 0
+
+    def get_profile(self, user_id):
+        return db_query(SQL_FETCH_PROFILE, (user_id,), one=True, pool=self.pool)
+
+    def update_profile(self, user_id, profile):
+        try:
+            db_execute(SQL_UPDATE_PROFILE, (*profile, user_id), pool=self.pool)
+        except sqlite3.IntegrityError:
+            raise UsernameTaken(profile[1]) from None
+
+    def delete_user(self, user_id, conn=None):
+        if conn is None:
+            return db_execute(SQL_DELETE_USER, (user_id,), pool=self.pool)
+        return conn.execute(SQL_DELETE_USER, (user_id,)).rowcount
+
+    def list_users(self, after=0, limit=ADMIN_PAGE_SIZE, search="", method=None, match="prefix"):
+        sql, params = _user_page_query(after, limit, search, method, match)
+        return db_query(sql, params, pool=self.read_pool)
+
+    def count_users(self, search="", method=None, match="prefix"):
+        clauses, params = _user_filter(search, method, match)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return db_query(f"SELECT COUNT(*) FROM users{where}", params, one=True, pool=self.read_pool)[0]
+
+    def export_page(self, after_id, limit):
+        return db_query(
+            f"SELECT {', '.join(EXPORT_COLUMNS)} FROM users WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit), pool=self.read_pool,
+        )
+
+    def avatars_in_use(self):
+        rows = db_query("SELECT DISTINCT avatar FROM users WHERE avatar IS NOT NULL AND avatar <> ''",
+                        pool=self.read_pool)
+        return {row[0] for row in rows}
+
+# SQLite before 3.32 accepts at most 999 bound parameters per statement.
+SQL_MAX_VARIABLES = 999
+
+def _existing_user_ids(conn, user_ids):
+    user_ids = list(user_ids)
+    existing = set()
+    for start in range(0, len(user_ids), SQL_MAX_VARIABLES):
+        batch = user_ids[start:start + SQL_MAX_VARIABLES]
+        placeholders = ",".join("?" * len(batch))
+        existing.update(row[0] for row in conn.execute(
+            f"SELECT user_id FROM users WHERE user_id IN ({placeholders})", batch))
+    return existing
+
+class MemoryUserStore(UserStore):
+    """Accounts in process memory, for tests, demos and running without a writable disk.
+
+    Enforces the same rules as the SQLite schema: unique user_id and username,
+    non-empty user_id and password hash.
+    """
+    name = "memory"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = {}  # id -> [id, method, user_id, hash, name, username, pronouns, bio, links, avatar]
+        self.ids = []  # ascending, for keyset pagination
+        self.user_ids = []  # ascending, for prefix searches
+        self.by_user_id = {}
+        self.usernames = {}
+        self.next_id = 1
+
+    def _insert(self, method, user_id, password_hash):
+        if not user_id.strip() or not password_hash:
+            raise ValueError("user_id and password must not be empty")
+        row_id = self.next_id
+        self.next_id += 1
+        self.rows[row_id] = [row_id, method, user_id, password_hash, None, None, None, None, None, None]
+        self.ids.append(row_id)
+        bisect.insort(self.user_ids, user_id)
+        self.by_user_id[user_id] = row_id
+
+    def _row(self, user_id, method=None):
+        row = self.rows.get(self.by_user_id.get(user_id))
+        return row if row and (method is None or row[1] == method) else None
+
+    def find_login(self, method, user_id):
+        with self.lock:
+            row = self._row(user_id, method)
+            return tuple(row[:4]) if row else None
+
+    def exists(self, method, user_id):
+        with self.lock:
+            return self._row(user_id, method) is not None
+
+    def add_user(self, method, user_id, password_hash):
+        with self.lock:
+            if user_id in self.by_user_id:
+                return False
+            self._insert(method, user_id, password_hash)
+            return True
+
+    def add_users(self, rows):
+        with self.lock:
+            taken = [user_id for _, user_id, _ in rows if user_id in self.by_user_id]
+            if any(not user_id.strip() or not password_hash for _, user_id, password_hash in rows):
+                raise ValueError("user_id and password must not be empty")
+            for method, user_id, password_hash in rows:
+                if user_id not in self.by_user_id:
+                    self._insert(method, user_id, password_hash)
+            return taken
+
+    def existing_user_ids(self, user_ids):
+        with self.lock:
+            return {user_id for user_id in user_ids if user_id in self.by_user_id}
+
+    def set_password(self, method, user_id, password_hash):
+        with self.lock:
+            row = self._row(user_id, method)
+            if row:
+                row[3] = password_hash
+            return int(row is not None)
+
+    def replace_password(self, row_id, old_hash, new_hash):
+        with self.lock:
+            row = self.rows.get(row_id)
+            if not row or row[3] != old_hash:
+                return False
+            row[3] = new_hash
+            return True
+
+    def get_profile(self, user_id):
+        with self.lock:
+            row = self._row(user_id)
+            return tuple(row[4:]) if row else None
+
+    def update_profile(self, user_id, profile):
+        with self.lock:
+            row = self._row(user_id)
+            if not row:
+                return
+            username = profile[1]
+            if username is not None and self.usernames.get(username, row[0]) != row[0]:
+                raise UsernameTaken(username)
+            self.usernames.pop(row[5], None)
+            if username is not None:
+                self.usernames[username] = row[0]
+            row[4:] = profile
+
+    def _delete(self, row):
+        del self.rows[row[0]]
+        del self.by_user_id[row[2]]
+        self.usernames.pop(row[5], None)
+        del self.ids[bisect.bisect_left(self.ids, row[0])]
+        del self.user_ids[bisect.bisect_left(self.user_ids, row[2])]
+
+    def delete_user(self, user_id, conn=None):
+        with self.lock:
+            row = self._row(user_id)
+            if row:
+                self._delete(row)
+            return int(row is not None)
+
+    def _matches(self, row, search, method, match):
+        if method and row[1] != method:
+            return False
+        if not search:
+            return True
+        return row[2].startswith(search) if match == "prefix" else search in row[2]
+
+    def list_users(self, after=0, limit=ADMIN_PAGE_SIZE, search="", method=None, match="prefix"):
+        page = []
+        with self.lock:
+            if _user_page_key(search, match) == "user_id":
+                # Same order as SQLite: str order is UTF-8 byte order.
+                start = bisect.bisect_left(self.user_ids, search)
+                if after:
+                    start = max(start, bisect.bisect_right(self.user_ids, after))
+                end = bisect.bisect_left(self.user_ids, search + "\U0010ffff", start)
+                order = (self.by_user_id[self.user_ids[i]] for i in range(start, end))
+            else:
+                order = self.ids[bisect.bisect_right(self.ids, after):]
+            for row_id in order:
+                row = self.rows[row_id]
+                if self._matches(row, search, method, match):
+                    page.append(tuple(row[:3]))
+                    if len(page) >= limit:
+                        break
+        return page
+
+    def count_users(self, search="", method=None, match="prefix"):
+        with self.lock:
+            return sum(1 for row in self.rows.values() if self._matches(row, search, method, match))
+
+    def export_page(self, after_id, limit):
+        columns = [USER_COLUMNS.index(column) for column in EXPORT_COLUMNS]
+        with self.lock:
+            ids = self.ids[bisect.bisect_right(self.ids, after_id):][:limit]
+            return [tuple(self.rows[row_id][i] for i in columns) for row_id in ids]
+
+    def avatars_in_use(self):
+        with self.lock:
+            return {row[9] for row in self.rows.values() if row[9]}
+
+USER_COLUMNS = ("id", "method", "user_id", "password", "name", "username", "pronouns", "bio", "links", "avatar")
+USER_STORES = {cls.name: cls for cls in (SqliteUserStore, MemoryUserStore)}
+
+@st.cache_resource
+def _open_user_store(name, path, replica):
+    if name not in USER_STORES:
+        raise ValueError(f"unknown user store {name!r}; choose from {', '.join(USER_STORES)}")
+    if name == "sqlite":
+        return SqliteUserStore(get_pool(path), _open_read_pool(replica) if replica else None)
+    return USER_STORES[name]()
+
+def get_user_store():
+    return _open_user_store(USER_STORE, DB_PATH, DB_READ_REPLICA)
+
+# ============= DATABASE FUNCTIONS =============
+@perf_timed()
+def login_user(method, user_id, password):
+    # Fetch by key and verify the hash here, so the index lookup does not
+    # depend on the password and the comparison is constant-time.
+    store = get_user_store()
+    result = store.find_login(method, user_id.strip())
+    if not result:
+        # Hash anyway, so response time does not tell which accounts exist.
+        run_hash_job(check_password, password, _dummy_password_hash())
+        return None
+    matches, needs_rehash = run_hash_job(check_password, password, result[3])
+    if not matches:
+        return None
+    if needs_rehash:
+        store.replace_password(result[0], result[3], run_hash_job(hash_password, password))
+    return result
+
+@perf_timed()
+def user_exists(method, user_id):
+    return get_user_store().exists(method, user_id.strip())
+
+@perf_timed()
+def update_password(method, user_id, new_password):
+    hashed = run_hash_job(hash_password, new_password)
+    get_user_store().set_password(method, user_id.strip(), hashed)
+    get_session_store().revoke_user(user_id.strip())
+
+@perf_timed()
+def fetch_profile(user_id):
+    try:
+        return get_user_store().get_profile(user_id)
+    except sqlite3.OperationalError:
+        return ("", "", "", "", "", "")
+
+@dataclass
+class ProfileCacheState:
+    lookups: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    # user_id -> version, least recently used first and at most
+    # PROFILE_CACHE_SIZE long; a new version makes the user's cached entries
+    # unreachable. Versions come from one counter, and users without an entry
+    # get floor, the newest version evicted, so a forgotten user can never
+    # fall back to a version whose cached entry predates a write.
+    versions: OrderedDict = field(default_factory=OrderedDict)
+    last_version: int = 0
+    floor: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def hits(self):
+        return self.lookups - self.misses
+
+@st.cache_resource
+def profile_cache_state():
+    return ProfileCacheState()
+
+@st.cache_data(ttl=PROFILE_CACHE_TTL_S, max_entries=PROFILE_CACHE_SIZE, show_spinner=False)
+def _cached_profile(user_id, version):
+    # Only runs on a cache miss.
+    state = profile_cache_state()
+    with state.lock:
+        state.misses += 1
+    return fetch_profile(user_id)
+
+@perf_timed()
+def get_profile(user_id):
+    """fetch_profile() through a per-user cache that writes invalidate.
+
+    Versions are per process; the TTL bounds how stale another server
+    process's copy can get.
+    """
+    state = profile_cache_state()
+    with state.lock:
+        state.lookups += 1
+        version = state.versions.get(user_id, state.floor)
+        if user_id in state.versions:
+            state.versions.move_to_end(user_id)
+    return _cached_profile(user_id, version)
+
+def invalidate_profile(user_id):
+    state = profile_cache_state()
+    with state.lock:
+        state.last_version += 1
+        state.versions[user_id] = state.last_version
+        state.versions.move_to_end(user_id)
+        state.invalidations += 1
+        while len(state.versions) > PROFILE_CACHE_SIZE:
+            _, version = state.versions.popitem(last=False)
+            state.floor = max(state.floor, version)
+
+@st.cache_resource
+def start_cleanup_scheduler(interval=CLEANUP_INTERVAL_S):
+    """Purge expired sessions and lockouts once per interval; returns the stop event."""
+    if interval <= 0:
+        return None
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                get_session_store().purge_expired()
+                get_login_guard().purge_expired()
+            except sqlite3.Error:
+                pass
+
+    threading.Thread(target=run, name="expired-cleanup", daemon=True).start()
+    return stop
+
+@perf_timed()
+def list_users(after=0, limit=ADMIN_PAGE_SIZE, search="", method=None, match="prefix"):
+    """Return one page of (id, method, user_id) rows after the cursor.
+
+    Keyset pagination: pass user_page_cursor() of the previous page's last row
+    as after (0 for the first page), so every page costs the same no matter
+    how deep into the table it is. Prefix searches are ordered by user_id,
+    everything else by id.
+    """
+    return get_user_store().list_users(after, limit, search, method, match)
+
+@st.cache_data(ttl=60, show_spinner=False)
+@perf_timed()
+def count_users(search="", method=None, match="prefix"):
+    return get_user_store().count_users(search, method, match)
+
+@perf_timed()
+def delete_user(user_id):
+    store = get_user_store()
+    with db_transaction() as conn:
+        forget_user_assessments(conn, user_id.strip())
+        # Last, so the in-memory store only forgets the account once
+        # everything before it has succeeded.
+        store.delete_user(user_id.strip(), conn)
+    get_session_store().revoke_user(user_id.strip())
+    count_users.clear()
+    invalidate_profile(user_id.strip())
+
+# Every keyed lookup must be answered from an index. Parameters are only
+# placeholders; EXPLAIN QUERY PLAN does not depend on their values.
+INDEXED_QUERIES = {
+    "login_user": (SQL_LOGIN, ("email", "")),
+    "user_exists": (SQL_USER_EXISTS, ("email", "")),
+    "update_password": (SQL_UPDATE_PASSWORD, ("", "email", "")),
+    "rehash_password": (SQL_REHASH_PASSWORD, ("", 0, "")),
+    "fetch_profile": (SQL_FETCH_PROFILE, ("",)),
+    "update_profile": (SQL_UPDATE_PROFILE, ("", None, "", "", "", "", "")),
+    "delete_user": (SQL_DELETE_USER, ("",)),
+    "list_users_prefix": _user_page_query("a@", 50, "a", "email"),
+}
+
+def check_query_plans(conn):
+    """Return {query name: plan details} for every lookup that scans a table."""
+    scans = {}
+    for name, (sql, params) in INDEXED_QUERIES.items():
+        details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        if any(detail.startswith("SCAN") for detail in details):
+            scans[name] = details
+    return scans
+
+# ============= SESSIONS =============
+# A sign-in issues a token "<id>.<signature>" that is kept in the page URL, so
+# a refresh or reconnect resumes the session with one keyed lookup instead of
+# a password check. The signature lets forged tokens be rejected without a
+# query; only a hash of the id is stored. Validated sessions are cached per
+# process and re-read after SESSION_RECHECK_S, so a revocation made by another
+# replica takes effect within that time.
+#
+# Streamlit cannot set cookies, so the URL is the only place the token can
+# live, and URLs end up in history, screenshots and shared links. To limit
+# that, every resume from the URL swaps in a new token and sessions expire
+# after SESSION_TTL_S from sign-in however often they are resumed. The old
+# token is kept, marked replaced: a tab already signed in with it stays
+# signed in (and swaps in its own new token), but it opens a new tab only for
+# SESSION_ROTATE_GRACE_S, so a copied link stops working soon after its owner
+# reloads. Logging out ends every token rotated from the same sign-in.
+SESSION_PARAM = "session"
+SESSION_RECHECK_S = 60
+
+@st.cache_resource
+def get_session_secret():
+    """Signing key: CAREER_APP_SECRET, else a random key shared through the database."""
+    configured = os.environ.get("CAREER_APP_SECRET")
+    if configured:
+        return configured.encode()
+    db_execute("INSERT OR IGNORE INTO app_secrets (name, value) VALUES ('session_key', ?)", (secrets.token_hex(32),))
+    return db_query("SELECT value FROM app_secrets WHERE name='session_key'", one=True)[0].encode()
+
+def _token_hash(session_id):
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+class SessionStore:
+    def __init__(self, secret, ttl=SESSION_TTL_S, capacity=SESSION_CACHE_SIZE, grace=SESSION_ROTATE_GRACE_S):
+        self.secret = secret
+        self.ttl = ttl
+        self.capacity = capacity
+        self.grace = grace
+        self.lock = threading.Lock()
+        # token hash -> (user_id, method, expires_at, replaced_at, checked_at), least recently used first
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _sign(self, session_id):
+        return hmac.new(self.secret, session_id.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.cache[key] = entry
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+
+    def _forget(self, keys):
+        with self.lock:
+            for key in keys:
+                self.cache.pop(key, None)
+
+    def issue(self, user_id, method):
+        session_id = secrets.token_urlsafe(24)
+        key = _token_hash(session_id)
+        now = time.time()
+        db_execute(
+            "INSERT INTO sessions (token_hash, user_id, method, created_at, expires_at, family) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, user_id, method, now, now + self.ttl, key),
+        )
+        self._remember(key, (user_id, method, now + self.ttl, None, now))
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def check(self, token, signed_in=False):
+        """Return (user_id, method, replaced) for a live session, else None.
+
+        replaced means the token has been rotated away. It still signs in a
+        tab that was already signed in with it (signed_in), but opens a new
+        one only within the grace period after the rotation.
+        """
+        session_id, _, signature = (token or "").partition(".")
+        if not session_id or not hmac.compare_digest(signature, self._sign(session_id)):
+            return None
+        key = _token_hash(session_id)
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry and now - entry[4] < SESSION_RECHECK_S:
+                self.cache.move_to_end(key)
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+        if entry is None:
+            row = db_query("SELECT user_id, method, expires_at, replaced_at FROM sessions WHERE token_hash=?",
+                           (key,), one=True)
+            if not row:
+                self._forget([key])
+                return None
+            entry = (*row, now)
+            self._remember(key, entry)
+        user_id, method, expires_at, replaced_at, _checked_at = entry
+        if expires_at <= now:
+            return None
+        if replaced_at is not None and not signed_in and now - replaced_at >= self.grace:
+            return None
+        return user_id, method, replaced_at is not None
+
+    def resume(self, token):
+        """Return (user_id, method) if the token can open a new tab, else None."""
+        session = self.check(token)
+        return session[:2] if session else None
+
+    def rotate(self, token):
+        """Give a live session a new token with the same expiry; returns it, or None if the session ended.
+
+        The old token is marked replaced rather than deleted; see check().
+        """
+        old_key = _token_hash((token or "").partition(".")[0])
+        session_id = secrets.token_urlsafe(24)
+        key = _token_hash(session_id)
+        now = time.time()
+        with db_transaction() as conn:
+            row = conn.execute("SELECT user_id, method, expires_at, replaced_at, family FROM sessions WHERE token_hash=?",
+                               (old_key,)).fetchone()
+            if row is None or row[2] <= now:
+                return None
+            user_id, method, expires_at, replaced_at, family = row
+            conn.execute(
+                "INSERT INTO sessions (token_hash, user_id, method, created_at, expires_at, family) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, user_id, method, now, expires_at, family),
+            )
+            if replaced_at is None:
+                replaced_at = now
+                conn.execute("UPDATE sessions SET replaced_at=? WHERE token_hash=?", (now, old_key))
+        self._remember(old_key, (user_id, method, expires_at, replaced_at, now))
+        self._remember(key, (user_id, method, expires_at, None, now))
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def revoke(self, token):
+        """End the sign-in the token belongs to, in every tab and with every token rotated from it."""
+        key = _token_hash((token or "").partition(".")[0])
+        with db_transaction() as conn:
+            keys = [row[0] for row in conn.execute(
+                "SELECT token_hash FROM sessions WHERE family=(SELECT family FROM sessions WHERE token_hash=?)", (key,))]
+            conn.execute("DELETE FROM sessions WHERE family=(SELECT family FROM sessions WHERE token_hash=?)", (key,))
+        self._forget([key, *keys])
+
+    def revoke_user(self, user_id):
+        db_execute("DELETE FROM sessions WHERE user_id=?", (user_id,))
+        with self.lock:
+            for key in [key for key, entry in self.cache.items() if entry[0] == user_id]:
+                del self.cache[key]
+
+    def purge_expired(self):
+        return db_execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+
+    def active_sessions(self):
+        """Live sign-ins; tokens rotated from the same sign-in count once."""
+        return db_query("SELECT COUNT(DISTINCT family) FROM sessions WHERE expires_at > ?", (time.time(),), one=True)[0]
+
+@st.cache_resource
+def get_session_store():
+    return SessionStore(get_session_secret())
+
+# ============= LOGIN THROTTLING =============
+# Checked before any query or hash is computed, so a credential-stuffing burst
+# costs a dictionary lookup per attempt. Failures are counted per account and
+# reaching LOGIN_MAX_FAILURES locks it for LOGIN_LOCKOUT_S; every attempt also
+# counts against the client address. Lockouts are written to SQLite and loaded
+# again when a process starts.
+THROTTLE_MAX_KEYS = 100000
+CLIENT_WINDOW_S = 60
+
+class SlidingWindowCounter:
+    """Approximate sliding-window counts in O(1) time and memory per key.
+
+    Keeps the counts of the current and previous fixed windows and weights the
+    previous one by how much of it still overlaps the sliding window. The least
+    recently used keys are evicted beyond max_keys.
+    """
+
+    def __init__(self, limit, window_s, max_keys=THROTTLE_MAX_KEYS):
+        self.limit = limit
+        self.window = window_s
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> [current window start, previous count, current count]
+
+    def _entry(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = [now - now % self.window, 0, 0]
+            while len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+        else:
+            self.entries.move_to_end(key)
+            elapsed = int((now - entry[0]) // self.window)
+            if elapsed:
+                entry[0] += elapsed * self.window
+                entry[1] = entry[2] if elapsed == 1 else 0
+                entry[2] = 0
+        return entry
+
+    def _estimate(self, entry, now):
+        overlap = 1 - (now - entry[0]) / self.window
+        return entry[1] * overlap + entry[2]
+
+    def count(self, key, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            return self._estimate(self._entry(key, now), now) if key in self.entries else 0
+
+    def hit(self, key, now=None):
+        """Record one event and return the updated count."""
+        now = time.time() if now is None else now
+        with self.lock:
+            entry = self._entry(key, now)
+            entry[2] += 1
+            return self._estimate(entry, now)
+
+    def retry_after(self, key, now=None):
+        """Seconds until the count drops below the limit, assuming no new events."""
+        now = time.time() if now is None else now
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or self._estimate(self._entry(key, now), now) < self.limit:
+                return 0
+            start, previous, current = entry
+            if current >= self.limit:
+                # Wait for the next window, then for enough of this one to fade.
+                return start + self.window * (2 - (self.limit - 0.5) / current) - now
+            return start + self.window * (1 - (self.limit - current - 0.5) / previous) - now
+
+    def reset(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+class LoginGuard:
+    def __init__(self):
+        self.failures = SlidingWindowCounter(LOGIN_MAX_FAILURES, LOGIN_FAILURE_WINDOW_S)
+        self.clients = SlidingWindowCounter(LOGIN_CLIENT_LIMIT, CLIENT_WINDOW_S)
+        self.lock = threading.Lock()
+        # account -> locked_until, soonest expiry first. Every lockout lasts
+        # LOGIN_LOCKOUT_S, so appending keeps that order and expired entries
+        # are always at the front.
+        self.lockouts = OrderedDict(db_query(
+            "SELECT account, locked_until FROM login_lockouts WHERE locked_until > ? ORDER BY locked_until",
+            (time.time(),)))
+        self._expire(time.time())
+        self.throttled = 0
+        self.locked_total = 0
+
+    def _expire(self, now):
+        # Called with self.lock held. Past THROTTLE_MAX_KEYS the soonest-expiring
+        # lockouts are only kept in SQLite, and apply again after a restart.
+        while self.lockouts and (next(iter(self.lockouts.values())) <= now
+                                 or len(self.lockouts) > THROTTLE_MAX_KEYS):
+            self.lockouts.popitem(last=False)
+
+    def check(self, account, client=None):
+        """Count an attempt and return how many seconds the caller must wait (0 = go ahead)."""
+        now = time.time()
+        with self.lock:
+            locked_until = self.lockouts.get(account, 0)
+            if locked_until > now:
+                self.throttled += 1
+                return locked_until - now
+            if locked_until:
+                self._expire(now)
+        if client is not None and self.clients.hit(client, now) > self.clients.limit:
+            with self.lock:
+                self.throttled += 1
+            return max(self.clients.retry_after(client, now), 1)
+        return 0
+
+    def record_failure(self, account):
+        if self.failures.hit(account) < self.failures.limit:
+            return
+        locked_until = time.time() + LOGIN_LOCKOUT_S
+        self.failures.reset(account)
+        with self.lock:
+            self.lockouts.pop(account, None)
+            self.lockouts[account] = locked_until
+            self._expire(time.time())
+            self.locked_total += 1
+        db_execute("INSERT OR REPLACE INTO login_lockouts (account, locked_until) VALUES (?, ?)",
+                   (account, locked_until))
+
+    def record_success(self, account):
+        self.failures.reset(account)
+
+    def unlock(self, account):
+        self.failures.reset(account)
+        with self.lock:
+            self.lockouts.pop(account, None)
+        db_execute("DELETE FROM login_lockouts WHERE account=?", (account,))
+
+    def active_lockouts(self):
+        now = time.time()
+        with self.lock:
+            return sorted((account, until) for account, until in self.lockouts.items() if until > now)
+
+    def purge_expired(self):
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+        return db_execute("DELETE FROM login_lockouts WHERE locked_until <= ?", (now,))
+
+@st.cache_resource
+def get_login_guard():
+    return LoginGuard()
+
+def throttle_account(method, user_id):
+    """Key for per-account counters; case-insensitive so case variants share one budget."""
+    return f"{method}:{(user_id or '').strip().lower()}"
+
+def client_address():
+    """Best-effort client IP for the current session, or None when unknown.
+
+    Behind TRUSTED_PROXIES proxies this is the address the outermost of them
+    added to X-Forwarded-For; entries to the left of it came from the client
+    and are ignored. Without proxies it is the address of the connection.
+    """
+    if TRUSTED_PROXIES:
+        hops = [hop.strip() for value in st.context.headers.get_all("X-Forwarded-For") for hop in value.split(",")]
+        return hops[-TRUSTED_PROXIES] if len(hops) >= TRUSTED_PROXIES else None
+    # st.context.ip_address is newer than the oldest Streamlit in
+    # requirements.txt; without it only TRUSTED_PROXIES can tell clients apart.
+    return getattr(st.context, "ip_address", None)
+
+def throttled_message(wait_s):
+    minutes, seconds = divmod(int(wait_s + 0.999), 60)
+    wait = f"{minutes} min {seconds} s" if minutes else f"{seconds} s"
+    return f"Too many attempts. Please try again in {wait}."
+
+# ============= BULK IMPORT / EXPORT =============
+IMPORT_CHUNK_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ("id", "method", "user_id", "name", "username", "pronouns", "bio", "links")
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    # (line number, user_id, reason) for every row that was not inserted
+    conflicts: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+
+def detect_format(filename):
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+def iter_import_rows(stream, fmt):
+    """Yield (line number, row dict or None) without reading the whole file."""
+    if fmt == "csv":
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+def validate_import_row(row):
+    """Return (method, user_id, password) or raise ValueError with the reason."""
+    if row is None:
+        raise ValueError("unparseable row")
+    # JSONL values can be numbers, lists or objects; validate_credentials
+    # rejects anything that is not text before it is normalised.
+    method = row.get("method")
+    if isinstance(method, str):
+        method = method.strip().lower()
+    return validate_credentials(method, row.get("user_id"), row.get("password"))
+
+def _import_chunk(chunk, seen, report):
+    # Skip known conflicts before hashing, so no work is spent on rows that
+    # will be rejected anyway.
+    store = get_user_store()
+    existing = store.existing_user_ids([user_id for _, _, user_id, _ in chunk])
+    pending = []
+    for line_no, method, user_id, password in chunk:
+        if user_id in existing or user_id in seen:
+            report.conflicts.append((line_no, user_id, "account already exists"))
+        else:
+            seen.add(user_id)
+            pending.append((line_no, method, user_id, password))
+    if not pending:
+        return
+    hashes = list(get_import_hash_executor().map(hash_password, [password for *_, password in pending]))
+    # add_users re-checks atomically in case another writer got there first.
+    taken = set(store.add_users([(method, user_id, hashed) for (_, method, user_id, _), hashed in zip(pending, hashes)]))
+    for line_no, _, user_id, _ in pending:
+        if user_id in taken:
+            report.conflicts.append((line_no, user_id, "account already exists"))
+    report.inserted += len(pending) - len(taken)
+
+def import_users(stream, fmt="csv", chunk_size=IMPORT_CHUNK_SIZE):
+    """Stream accounts from a CSV/JSONL text stream with method, user_id, password columns.
+
+    Rows are validated as they are read, hashed in a worker pool and inserted
+    with executemany, one transaction per chunk.
+    """
+    report = ImportReport()
+    seen = set()
+    chunk = []
+    for line_no, row in iter_import_rows(stream, fmt):
+        try:
+            method, user_id, password = validate_import_row(row)
+        except ValueError as e:
+            report.invalid.append((line_no, str((row or {}).get("user_id", "")), str(e)))
+            continue
+        chunk.append((line_no, method, user_id, password))
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, seen, report)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, seen, report)
+    count_users.clear()
+    return report
+
+def iter_export_rows(table, columns, batch_size=EXPORT_BATCH_SIZE):
+    """Yield rows of a SQLite table one keyset batch at a time; columns[0] must be its id."""
+    after_id = 0
+    while True:
+        rows = db_query(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, batch_size),
+        )
+        if not rows:
+            return
+        yield from rows
+        after_id = rows[-1][0]
+
+def export_rows(out, fmt, columns, rows):
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            out.write(json.dumps(dict(zip(columns, row))) + "\n")
+            count += 1
+    return count
+
+def iter_user_export_rows(batch_size=EXPORT_BATCH_SIZE):
+    """Yield EXPORT_COLUMNS rows (no password hashes) from the user store in keyset batches."""
+    store = get_user_store()
+    after_id = 0
+    while True:
+        rows = store.export_page(after_id, batch_size)
+        if not rows:
+            return
+        yield from rows
+        after_id = rows[-1][0]
+
+def export_users(out, fmt="csv"):
+    return export_rows(out, fmt, EXPORT_COLUMNS, iter_user_export_rows())
+
+# ============= AVATAR STORAGE =============
+# Originals are stored once under the SHA-256 of their bytes, so identical
+# uploads share a file; the avatar column holds that path. Each original has
+# a fixed-size JPEG thumbnail in thumbs/, made at upload time.
+AVATAR_THUMB_DIR = os.path.join(AVATAR_DIR, "thumbs")
+AVATAR_THUMB_PX = 120
+AVATAR_CHUNK_BYTES = 64 * 1024
+AVATAR_MAX_BYTES = int(os.environ.get("CAREER_APP_AVATAR_MAX_BYTES", str(10 * 1024 * 1024)))
+# Files younger than this are never collected, so an upload whose profile
+# update has not been saved yet is not removed from under it.
+AVATAR_GC_GRACE_S = 3600
+AVATAR_FORMATS = {"PNG": ".png", "JPEG": ".jpg"}
+
+def avatar_thumbnail_path(avatar):
+    return os.path.join(AVATAR_THUMB_DIR, os.path.splitext(os.path.basename(avatar))[0] + ".jpg")
+
+def make_thumbnail(src, dest):
+    from PIL import Image, ImageOps
+    with Image.open(src) as img:
+        img = ImageOps.exif_transpose(img).convert("RGBA")
+    img = ImageOps.fit(img, (AVATAR_THUMB_PX, AVATAR_THUMB_PX), Image.Resampling.LANCZOS)
+    thumb = Image.new("RGB", img.size, "white")
+    thumb.paste(img, mask=img.getchannel("A"))
+    tmp_path = f"{dest}.{threading.get_ident()}.tmp"
+    thumb.save(tmp_path, "JPEG", quality=85)
+    os.replace(tmp_path, dest)
+
+def store_avatar(upload):
+    """Stream an uploaded image into the store and return its path.
+
+    Raises ValueError if the file is too large or not a PNG/JPEG image.
+    """
+    from PIL import Image
+    os.makedirs(AVATAR_THUMB_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=AVATAR_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: upload.read(AVATAR_CHUNK_BYTES), b""):
+                size += len(chunk)
+                if size > AVATAR_MAX_BYTES:
+                    raise ValueError(f"image is larger than {AVATAR_MAX_BYTES // (1024 * 1024)} MB")
+                digest.update(chunk)
+                out.write(chunk)
+        try:
+            with Image.open(tmp_path) as img:
+                ext = AVATAR_FORMATS.get(img.format)
+        except (OSError, Image.DecompressionBombError):
+            ext = None
+        if ext is None:
+            raise ValueError("not a PNG or JPEG image")
+        path = os.path.join(AVATAR_DIR, digest.hexdigest() + ext)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            os.utime(path)  # restart the GC grace period for the shared file
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    thumb = avatar_thumbnail_path(path)
+    if not os.path.exists(thumb):
+        make_thumbnail(path, thumb)
+    return path
+
+@st.cache_data(max_entries=1000, show_spinner=False)
+def load_avatar_thumbnail(avatar):
+    """Return thumbnail bytes for an avatar path, or None if the file is gone.
+
+    Stored paths are content-addressed, so a cached entry never goes stale.
+    """
+    from PIL import Image
+    thumb = avatar_thumbnail_path(avatar)
+    try:
+        if not os.path.exists(thumb):
+            # Uploads from before the store existed get their thumbnail lazily.
+            os.makedirs(AVATAR_THUMB_DIR, exist_ok=True)
+            make_thumbnail(avatar, thumb)
+        with open(thumb, "rb") as f:
+            return f.read()
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+def gc_avatars(grace_s=AVATAR_GC_GRACE_S):
+    """Delete avatar files and thumbnails no account references; returns (files, bytes)."""
+    referenced = {os.path.abspath(avatar) for avatar in get_user_store().avatars_in_use()}
+    keep = referenced | {os.path.abspath(avatar_thumbnail_path(path)) for path in referenced}
+    cutoff = time.time() - grace_s
+    removed = freed = 0
+    for directory in (AVATAR_DIR, AVATAR_THUMB_DIR):
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if not entry.is_file() or os.path.abspath(entry.path) in keep:
+                continue
+            stat = entry.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += stat.st_size
+    return removed, freed
+
+# ============= FEEDBACK =============
+FEEDBACK_COLUMNS = ("id", "user_id", "message", "created_at")
+FEEDBACK_MAX_CHARS = 5000
+SQL_INSERT_FEEDBACK = "INSERT INTO feedback (user_id, message, created_at) VALUES (?, ?, ?)"
+
+class FeedbackWriter:
+    """Write-behind buffer for feedback submissions.
+
+    submit() only enqueues; one background thread writes everything that has
+    accumulated in a single executemany transaction at most once per flush
+    interval, so a burst of submissions costs one commit instead of one each.
+    If a batch fails, its rows are retried one at a time: rows the database
+    rejects are set aside in dead_letters, and rows it could not take right
+    now wait for the next flush, up to max_pending of them.
+    """
+
+    def __init__(self, flush_interval=FEEDBACK_FLUSH_INTERVAL_S, max_pending=FEEDBACK_MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self.rejected = 0
+        self.failed = 0
+        self.dead_letters = deque(maxlen=FEEDBACK_DEAD_LETTERS)
+        self.last_error = ""
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._max_retry = max_pending
+        self._retry = []
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self._queue.qsize() + len(self._retry)
+
+    def submit(self, user_id, message):
+        """Queue one submission; returns False if the buffer is full."""
+        try:
+            self._queue.put_nowait((user_id, message, time.time()))
+        except queue.Full:
+            self.rejected += 1
+            return False
+        return True
+
+    def flush(self):
+        with self._flush_lock:
+            rows, self._retry = self._retry, []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not rows:
+                return 0
+            try:
+                with db_transaction() as conn:
+                    conn.executemany(SQL_INSERT_FEEDBACK, rows)
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+                written = self._write_one_by_one(rows)
+            else:
+                written = len(rows)
+                self.last_error = ""
+            if written:
+                self.written += written
+                self.batches += 1
+                count_feedback.clear()
+            return written
+
+    def _write_one_by_one(self, rows):
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                with db_transaction() as conn:
+                    conn.execute(SQL_INSERT_FEEDBACK, row)
+            except sqlite3.OperationalError as e:
+                # Locked or unavailable: the remaining rows would fail the same way.
+                self.last_error = str(e)
+                self._retry = rows[i:i + self._max_retry]
+                self.rejected += len(rows) - i - len(self._retry)
+                break
+            except sqlite3.Error as e:
+                self.last_error = str(e)
+                self.failed += 1
+                self.dead_letters.append((*row, str(e)))
+                print(f"Dropped feedback from {row[0]!r}: {e}", file=sys.stderr)
+            else:
+                written += 1
+        return written
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+@st.cache_resource
+def get_feedback_writer():
+    writer = FeedbackWriter()
+    atexit.register(writer.close)
+    return writer
+
+@perf_timed()
+def list_feedback(before_id=None, limit=ADMIN_PAGE_SIZE):
+    """Return one page of feedback rows, newest first, with id < before_id."""
+    if before_id is None:
+        return db_query(f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback ORDER BY id DESC LIMIT ?", (limit,))
+    return db_query(
+        f"SELECT {', '.join(FEEDBACK_COLUMNS)} FROM feedback WHERE id < ? ORDER BY id DESC LIMIT ?",
+        (before_id, limit),
+    )
+
+@st.cache_data(ttl=60, show_spinner=False)
+@perf_timed()
+def count_feedback():
+    return db_query("SELECT COUNT(*) FROM feedback", one=True)[0]
+
+def export_feedback(out, fmt="csv"):
+    return export_rows(out, fmt, FEEDBACK_COLUMNS, iter_export_rows("feedback", FEEDBACK_COLUMNS))
+
+# ============= CONTENT CATALOG =============
+# Domains, skills and resources live in a JSON file (see career_catalog.json).
+# A resource lists the domains it applies to, "*" meaning all of them, and its
+# link may contain {domain}, which is filled in when the catalog is indexed.
+CATALOG_VERSION = 1
+
+def build_catalog(raw):
+    """Validate a parsed catalog file and pre-index its resources by domain."""
+    if raw.get("version") != CATALOG_VERSION:
+        raise ValueError(f"unsupported catalog version {raw.get('version')!r} (expected {CATALOG_VERSION})")
+    domains = list(raw["domains"])
+    by_domain = {domain: [] for domain in domains}
+    resources = []
+    for resource in raw["resources"]:
+        tags = resource.get("domains", ["*"])
+        resources.append({"name": resource["name"], "link": resource["link"],
+                          "desc": resource.get("desc", ""), "domains": list(tags)})
+        for domain in domains if "*" in tags else tags:
+            if domain not in by_domain:
+                raise ValueError(f"resource {resource['name']!r} names unknown domain {domain!r}")
+            by_domain[domain].append({
+                "name": resource["name"],
+                "link": resource["link"].replace("{domain}", quote_plus(domain)),
+                "desc": resource.get("desc", ""),
+            })
+    requirements = {}
+    for domain, skills in raw.get("requirements", {}).items():
+        if domain not in by_domain:
+            raise ValueError(f"requirements name unknown domain {domain!r}")
+        requirements[domain] = [
+            {"skill": r["skill"], "target": int(r["target"]), "weight": float(r.get("weight", 1))} for r in skills
+        ]
+        if any(not 0 < r["target"] <= 100 or r["weight"] <= 0 for r in requirements[domain]):
+            raise ValueError(f"{domain!r} requirements need targets in 1-100 and positive weights")
+    return {
+        "version": raw["version"],
+        "domains": domains,
+        "requirements": requirements,
+        "skills_now": list(raw["skills"]["now"]),
+        "skills_future": list(raw["skills"]["future"]),
+        "by_domain": by_domain,
+        "resources": resources,
+        "universal_resources": list(raw.get("universal_resources", [])),
+    }
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_catalog(path, mtime_ns):
+    # mtime_ns is only part of the cache key: editing the file starts a new entry.
+    # cache_resource rather than cache_data: every caller shares one read-only
+    # catalog instead of unpickling a fresh copy of it on each call.
+    with open(path, encoding="utf-8") as f:
+        catalog = build_catalog(json.load(f))
+    catalog["revision"] = mtime_ns
+    return catalog
+
+@st.cache_resource
+def _last_good_catalog():
+    return {}
+
+def get_catalog():
+    """Return the content catalog, reloading it when the file changes.
+
+    If an edited file fails to load, the last catalog that did load keeps
+    being served and the error is logged once; that version of the file is
+    not tried again until it changes.
+    """
+    last_good = _last_good_catalog()
+    mtime_ns = None
+    try:
+        mtime_ns = os.stat(CATALOG_PATH).st_mtime_ns
+        if "catalog" in last_good and mtime_ns == last_good.get("failed_mtime_ns"):
+            return last_good["catalog"]
+        catalog = _load_catalog(CATALOG_PATH, mtime_ns)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        if "catalog" not in last_good:
+            raise
+        if "failed_mtime_ns" not in last_good or last_good["failed_mtime_ns"] != mtime_ns:
+            print(f"Could not reload {CATALOG_PATH}: {e!r}; serving version loaded earlier.", file=sys.stderr)
+            last_good["failed_mtime_ns"] = mtime_ns
+        return last_good["catalog"]
+    last_good["catalog"] = catalog
+    last_good.pop("failed_mtime_ns", None)
+    return catalog
+
+# ============= CATALOG SEARCH =============
+# The catalog is a file that can change at any time, so its full-text index
+# is an in-memory FTS5 table rebuilt once per catalog revision rather than a
+# table in users.db.
+SEARCH_LIMIT = 20
+SEARCH_CACHE_SIZE = 2048
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix.
+
+    Single letters match only themselves ("r", "c"): as prefixes they match
+    most of the index and have no prefix index to use.
+    """
+    return " ".join(f'"{word}"' if len(word) == 1 else f'"{word}"*' for word in re.findall(r"\w+", text.lower()))
+
+class SearchIndex:
+    """FTS5 index over one revision of the catalog's resources and skills."""
+
+    def __init__(self, catalog):
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute('''
+        CREATE VIRTUAL TABLE catalog_fts USING fts5(
+            name, description, tags, kind UNINDEXED, link UNINDEXED,
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''')
+        rows = [
+            (r["name"], r["desc"], "general" if "*" in r["domains"] else " ".join(r["domains"]), "resource", r["link"])
+            for r in catalog["resources"]
+        ]
+        rows += [(skill, "Hot right now", "skill", "skill", "") for skill in catalog["skills_now"]]
+        rows += [(skill, "Shaping the future", "skill", "skill", "") for skill in catalog["skills_future"]]
+        needed_for = {}
+        for domain, skills in catalog["requirements"].items():
+            for r in skills:
+                needed_for.setdefault(r["skill"], []).append(domain)
+        rows += [(skill, f"Needed for {', '.join(domains)}", " ".join(domains), "skill", "")
+                 for skill, domains in needed_for.items()]
+        self._conn.executemany("INSERT INTO catalog_fts (name, description, tags, kind, link) VALUES (?, ?, ?, ?, ?)", rows)
+        self.size = len(rows)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Return (kind, name, description, link template) rows, best BM25 match first."""
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            # Weights: name matches count most, then domain tags, then description.
+            return self._conn.execute(
+                "SELECT kind, name, description, link FROM catalog_fts WHERE catalog_fts MATCH ? "
+                "ORDER BY bm25(catalog_fts, 10.0, 1.0, 5.0) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+
+@st.cache_resource(max_entries=1)
+def get_search_index(revision, _catalog):
+    return SearchIndex(_catalog)
+
+@st.cache_data(max_entries=SEARCH_CACHE_SIZE, show_spinner=False)
+def _cached_search(revision, query, limit):
+    catalog = get_catalog()
+    rows = get_search_index(catalog["revision"], catalog).search(query, limit)
+    return [
+        {"kind": kind, "name": name, "desc": desc, "link": link.replace("{domain}", quote_plus(query))}
+        for kind, name, desc, link in rows
+    ]
+
+@perf_timed()
+def search_catalog(query, limit=SEARCH_LIMIT):
+    """Full-text search over the catalog, cached per (catalog revision, query)."""
+    query = " ".join(query.split())
+    if not query:
+        return []
+    return _cached_search(get_catalog()["revision"], query, limit)
+
+# ============= LINK HEALTH =============
+# Catalog links are checked off the request path, by a background thread or
+# `python app.py check-links`; pages only read the cached rows in link_status.
+LINK_CHECK_CONCURRENCY = int(os.environ.get("CAREER_APP_LINK_CHECK_CONCURRENCY", "8"))
+# Minimum seconds between two requests to the same host.
+LINK_CHECK_HOST_DELAY_S = float(os.environ.get("CAREER_APP_LINK_CHECK_HOST_DELAY", "1.0"))
+LINK_CHECK_TIMEOUT_S = float(os.environ.get("CAREER_APP_LINK_CHECK_TIMEOUT", "10"))
+# Results younger than this are not rechecked.
+LINK_CHECK_TTL_S = int(os.environ.get("CAREER_APP_LINK_CHECK_TTL", str(24 * 3600)))
+# Seconds between background checks; 0 disables the scheduler.
+LINK_CHECK_INTERVAL_S = int(os.environ.get("CAREER_APP_LINK_CHECK_INTERVAL", "3600"))
+LINK_CHECK_USER_AGENT = "CareerNavigatorLinkCheck/1.0"
+LINK_STATUS_COLUMNS = ("url", "status", "ok", "error", "etag", "last_modified", "final_url",
+                       "failures", "elapsed_ms", "checked_at")
+
+@dataclass
+class LinkResult:
+    url: str
+    status: int = None
+    ok: bool = False
+    error: str = ""
+    etag: str = None
+    last_modified: str = None
+    final_url: str = None
+    failures: int = 0
+    elapsed_ms: float = 0.0
+    checked_at: float = 0.0
+
+    def row(self):
+        return tuple(getattr(self, column) for column in LINK_STATUS_COLUMNS)
+
+@dataclass
+class LinkCheckStats:
+    runs: int = 0
+    running: bool = False
+    last_checked: int = 0
+    last_broken: int = 0
+    last_run_at: float = None
+    last_duration_ms: float = 0.0
+    last_error: str = ""
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+@st.cache_resource
+def link_check_stats():
+    return LinkCheckStats()
+
+def catalog_links(catalog):
+    """Return {url: [resource names]} for every link a page can show."""
+    links = {}
+    for resources in catalog["by_domain"].values():
+        for r in resources:
+            links.setdefault(r["link"], set()).add(r["name"])
+    for r in catalog["universal_resources"]:
+        links.setdefault(r["link"], set()).add(r["name"])
+    return {url: sorted(names) for url, names in sorted(links.items())}
+
+def http_probe(method, url, headers, timeout):
+    """Send one request without reading the body; returns (status, response headers, final url).
+
+    urllib raises for anything but 2xx (304 included), so HTTPError is just
+    another response here. Network failures propagate.
+    """
+    request = Request(url, method=method, headers={"User-Agent": LINK_CHECK_USER_AGENT, **headers})
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            return response.status, response.headers, response.url
+    except HTTPError as e:
+        with e:
+            return e.code, e.headers, e.url
+
+async def check_links_async(links, previous=None, concurrency=LINK_CHECK_CONCURRENCY,
+                            host_delay=LINK_CHECK_HOST_DELAY_S, timeout=LINK_CHECK_TIMEOUT_S, probe=http_probe):
+    """Check links concurrently and return a LinkResult per url.
+
+    At most concurrency requests are in flight, and each host gets one request
+    at a time, host_delay seconds apart. Validators from previous results are
+    sent as If-None-Match/If-Modified-Since, so an unchanged page costs a 304.
+    """
+    previous = previous or {}
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    host_locks = {}
+    next_allowed = {}
+
+    async def polite_request(result, host, method, url, headers):
+        # Called with the host's lock held, so the spacing holds per host.
+        delay = next_allowed.get(host, 0) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    return await loop.run_in_executor(None, probe, method, url, headers, timeout)
+                finally:
+                    result.elapsed_ms += (time.perf_counter() - started) * 1000
+        finally:
+            next_allowed[host] = time.monotonic() + host_delay
+
+    async def check(url):
+        before = previous.get(url)
+        result = LinkResult(url)
+        headers = {}
+        if before and before.ok:
+            if before.etag:
+                headers["If-None-Match"] = before.etag
+            if before.last_modified:
+                headers["If-Modified-Since"] = before.last_modified
+        host = urlsplit(url).netloc.lower()
+        try:
+            async with host_locks.setdefault(host, asyncio.Lock()):
+                status, response_headers, final_url = await polite_request(result, host, "HEAD", url, headers)
+                if status >= 400 and status not in (404, 410):
+                    # Plenty of servers refuse HEAD; only a GET is conclusive.
+                    status, response_headers, final_url = await polite_request(result, host, "GET", url, headers)
+        except (URLError, OSError, ValueError, HTTPException) as e:
+            result.error = str(getattr(e, "reason", e)) or type(e).__name__
+        else:
+            result.status, result.final_url = status, final_url
+            result.ok = status < 400
+            result.etag = response_headers.get("ETag")
+            result.last_modified = response_headers.get("Last-Modified")
+            if status == 304 and before:
+                # Not modified: the earlier validators and final url still apply.
+                result.etag = result.etag or before.etag
+                result.last_modified = result.last_modified or before.last_modified
+                result.final_url = before.final_url
+            elif not result.ok:
+                result.error = f"HTTP {status}"
+        result.checked_at = time.time()
+        result.failures = 0 if result.ok else (before.failures if before else 0) + 1
+        return result
+
+    return await asyncio.gather(*(check(url) for url in links))
+
+def link_statuses(pool=None):
+    """Return {url: LinkResult} for every cached check."""
+    rows = db_query(f"SELECT {', '.join(LINK_STATUS_COLUMNS)} FROM link_status", pool=pool)
+    return {row[0]: LinkResult(*row[:2], bool(row[2]), *row[3:]) for row in rows}
+
+def save_link_statuses(results, pool=None):
+    columns = ", ".join(LINK_STATUS_COLUMNS)
+    updates = ", ".join(f"{column}=excluded.{column}" for column in LINK_STATUS_COLUMNS[1:])
+    with db_transaction(pool) as conn:
+        conn.executemany(
+            f"INSERT INTO link_status ({columns}) VALUES ({', '.join('?' * len(LINK_STATUS_COLUMNS))}) "
+            f"ON CONFLICT (url) DO UPDATE SET {updates}",
+            [result.row() for result in results],
+        )
+
+def check_links(urls=None, force=False, pool=None, **options):
+    """Check urls (default: the catalog's links) whose cached result is older than the TTL.
+
+    Returns the new results, or None if another check is already running.
+    options are passed on to check_links_async().
+    """
+    stats = link_check_stats()
+    if not stats.lock.acquire(blocking=False):
+        return None
+    try:
+        stats.running = True
+        started = time.perf_counter()
+        previous = link_statuses(pool)
+        if urls is None:
+            urls = list(catalog_links(get_catalog()))
+        if not force:
+            stale_before = time.time() - LINK_CHECK_TTL_S
+            urls = [url for url in urls if url not in previous or previous[url].checked_at < stale_before]
+        try:
+            results = asyncio.run(check_links_async(urls, previous, **options)) if urls else []
+            save_link_statuses(results, pool)
+        except Exception as e:
+            stats.last_error = str(e)
+            raise
+        stats.runs += 1
+        stats.last_checked = len(results)
+        stats.last_broken = sum(not result.ok for result in results)
+        stats.last_run_at = time.time()
+        stats.last_duration_ms = (time.perf_counter() - started) * 1000
+        stats.last_error = ""
+        return results
+    finally:
+        stats.running = False
+        stats.lock.release()
+
+def check_links_in_background(force=False):
+    """Start check_links() on its own thread so the caller's rerun does not wait."""
+    threading.Thread(target=check_links, kwargs={"force": force}, name="link-check", daemon=True).start()
+
+@st.cache_resource
+def start_link_checker(interval=LINK_CHECK_INTERVAL_S):
+    """Recheck stale catalog links every interval seconds; returns the stop event."""
+    if interval <= 0:
+        return None
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                check_links()
+            except Exception:
+                pass  # recorded in link_check_stats().last_error
+
+    threading.Thread(target=run, name="link-check-scheduler", daemon=True).start()
+    return stop
+
+# ============= READINESS SCORING =============
+# Each domain in the catalog lists the skills it needs with a target level
+# (0-100) and a weight. For a user's confidence c in skill s and a domain d:
+#   readiness[d] = 100 * sum_s w[d,s] * min(c[s] / target[d,s], 1)   (weights normalised per domain)
+#   gap[d,s]     = w[d,s] * max(target[d,s] - c[s], 0)
+# Unrated skills count as 0. Everything is computed for many users at once.
+JOB_READY_SCORE = 70
+DEFAULT_CONFIDENCE = 50
+COHORT_CHUNK = 20000  # users scored per batch; bounds the users x domains x skills gap array
+
+class ScoringModel:
+    """Targets and weights for every (domain, skill) pair as dense matrices."""
+
+    def __init__(self, catalog):
+        self.requirements = catalog["requirements"]
+        self.domains = [domain for domain in catalog["domains"] if self.requirements.get(domain)]
+        self.skills = sorted({r["skill"] for domain in self.domains for r in self.requirements[domain]})
+        self.domain_index = {domain: i for i, domain in enumerate(self.domains)}
+        self.skill_index = {skill: i for i, skill in enumerate(self.skills)}
+        shape = (len(self.domains), len(self.skills))
+        # Skills a domain does not need keep target 1 and weight 0, so they
+        # drop out of both formulas without any masking.
+        self.targets = _np().ones(shape, _np().float32)
+        weights = _np().zeros(shape, _np().float32)
+        for d, domain in enumerate(self.domains):
+            for r in self.requirements[domain]:
+                s = self.skill_index[r["skill"]]
+                self.targets[d, s] = r["target"]
+                weights[d, s] = r["weight"]
+        self.weights = weights / weights.sum(axis=1, keepdims=True) if self.domains else weights
+
+    def domain_skills(self, domain):
+        return [r["skill"] for r in self.requirements.get(domain, [])]
+
+    def confidence_vector(self, ratings):
+        vector = _np().zeros(len(self.skills), _np().float32)
+        for skill, confidence in ratings.items():
+            if skill in self.skill_index:
+                vector[self.skill_index[skill]] = confidence
+        return vector
+
+    def score(self, confidence):
+        """Return readiness (users x domains) and weighted gaps (users x domains x skills)."""
+        c = _np().asarray(confidence, _np().float32)[:, None, :]
+        readiness = 100 * (_np().minimum(c / self.targets, 1) * self.weights).sum(axis=2)
+        gaps = _np().maximum(self.targets - c, 0) * self.weights
+        return readiness, gaps
+
+    def recommend(self, confidence, domain, limit=3):
+        """Return up to limit (skill, points short of target) pairs, biggest weighted gap first."""
+        d = self.domain_index[domain]
+        c = _np().asarray(confidence, _np().float32)
+        _, gaps = self.score(c[None, :])
+        order = _np().argsort(-gaps[0, d], kind="stable")
+        return [
+            (self.skills[s], float(self.targets[d, s] - c[s]))
+            for s in order[:limit] if gaps[0, d, s] > 0
+        ]
+
+@st.cache_resource(max_entries=1)
+def get_scoring_model(revision, _catalog):
+    return ScoringModel(_catalog)
+
+def fetch_skill_ratings(user_id):
+    return dict(db_query("SELECT skill, confidence FROM skill_ratings WHERE user_id=?", (user_id,)))
+
+def save_skill_ratings(conn, user_id, ratings, now):
+    conn.executemany(
+        '''
+        INSERT INTO skill_ratings (user_id, skill, confidence, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, skill) DO UPDATE SET confidence=excluded.confidence, updated_at=excluded.updated_at
+        ''',
+        [(user_id, skill, int(confidence), now) for skill, confidence in ratings.items()],
+    )
+
+def load_confidence_matrix(model):
+    """Return (user ids, users x skills confidence matrix) for everyone with saved ratings."""
+    with get_pool().connection() as conn:
+        ratings = _pd().read_sql_query("SELECT user_id, skill, confidence FROM skill_ratings", conn)
+    user_codes, users = _pd().factorize(ratings["user_id"])
+    skill_codes = ratings["skill"].map(model.skill_index)
+    # Ratings for skills the catalog no longer lists are ignored.
+    known = skill_codes.notna().to_numpy()
+    matrix = _np().zeros((len(users), len(model.skills)), _np().float32)
+    matrix[user_codes[known], skill_codes[known].astype(int)] = ratings["confidence"].to_numpy()[known]
+    return users, matrix
+
+@perf_timed()
+def cohort_report(model):
+    """Score every user with saved ratings against every domain.
+
+    Returns (number of users, DataFrame with one row per domain).
+    """
+    users, matrix = load_confidence_matrix(model)
+    readiness = _np().empty((len(users), len(model.domains)), _np().float32)
+    gap_totals = _np().zeros((len(model.domains), len(model.skills)), _np().float64)
+    for start in range(0, len(users), COHORT_CHUNK):
+        chunk_readiness, chunk_gaps = model.score(matrix[start:start + COHORT_CHUNK])
+        readiness[start:start + COHORT_CHUNK] = chunk_readiness
+        gap_totals += chunk_gaps.sum(axis=0)
+    if not len(users):
+        return 0, _pd().DataFrame()
+    best_fit = _np().bincount(readiness.argmax(axis=1), minlength=len(model.domains))
+    report = _pd().DataFrame({
+        "Domain": model.domains,
+        "Mean readiness": readiness.mean(axis=0),
+        "Median readiness": _np().median(readiness, axis=0),
+        "Job-ready %": (readiness >= JOB_READY_SCORE).mean(axis=0) * 100,
+        "Best fit (users)": best_fit,
+        "Biggest gap": [model.skills[s] for s in gap_totals.argmax(axis=1)],
+    })
+    return len(users), report.round(1)
+
+# ============= ASSESSMENTS =============
+# Every saved assessment is appended to the assessments table. The user's
+# ratings and the rollups (latest score per user and domain, cohort totals of
+# those latest scores and per-day totals) are written in the same
+# transaction, so pages read a few keyed rows instead of aggregating the
+# history.
+ASSESSMENT_HISTORY_LIMIT = 50
+COHORT_TREND_DAYS = 90
+
+SQL_UPSERT_LATEST = '''
+    INSERT INTO assessment_latest (user_id, domain, score, previous_score, first_score, assessments, updated_at)
+    VALUES (?, ?, ?, NULL, ?, 1, ?)
+    ON CONFLICT (user_id, domain) DO UPDATE SET
+        previous_score=assessment_latest.score, score=excluded.score,
+        assessments=assessment_latest.assessments + 1, updated_at=excluded.updated_at
+'''
+SQL_UPSERT_COHORT = '''
+    INSERT INTO assessment_cohort (domain, users, score_sum, job_ready) VALUES (?, ?, ?, ?)
+    ON CONFLICT (domain) DO UPDATE SET
+        users=users + excluded.users, score_sum=score_sum + excluded.score_sum,
+        job_ready=job_ready + excluded.job_ready
+'''
+SQL_UPSERT_DAILY = '''
+    INSERT INTO assessment_daily (day, domain, assessments, score_sum) VALUES (?, ?, 1, ?)
+    ON CONFLICT (day, domain) DO UPDATE SET
+        assessments=assessments + 1, score_sum=score_sum + excluded.score_sum
+'''
+
+@perf_timed()
+def record_assessment(user_id, domain, score, ratings, skills):
+    """Save the user's ratings, append an assessment of domain over skills and fold it into the rollups.
+
+    All of it is one transaction, so the history and the rollups never disagree.
+    """
+    now = time.time()
+    score = round(float(score), 1)
+    with db_transaction() as conn:
+        save_skill_ratings(conn, user_id, ratings, now)
+        previous = conn.execute(
+            "SELECT score FROM assessment_latest WHERE user_id=? AND domain=?", (user_id, domain)
+        ).fetchone()
+        conn.execute(
+            "INSERT INTO assessments (user_id, domain, score, ratings, created_at) VALUES (?, ?, ?, ?, ?)",
+            (user_id, domain, score, json.dumps({skill: ratings[skill] for skill in skills}, sort_keys=True), now),
+        )
+        conn.execute(SQL_UPSERT_LATEST, (user_id, domain, score, score, now))
+        ready = int(score >= JOB_READY_SCORE)
+        if previous is None:
+            conn.execute(SQL_UPSERT_COHORT, (domain, 1, score, ready))
+        else:
+            old = previous[0]
+            conn.execute(SQL_UPSERT_COHORT, (domain, 0, score - old, ready - int(old >= JOB_READY_SCORE)))
+        conn.execute(SQL_UPSERT_DAILY, (time.strftime("%Y-%m-%d", time.gmtime(now)), domain, score))
+
+def forget_user_assessments(conn, user_id):
+    """Remove a user's ratings and assessments and take them out of the cohort rollup.
+
+    Daily totals are left alone; they record activity that did happen.
+    """
+    for domain, score in conn.execute("SELECT domain, score FROM assessment_latest WHERE user_id=?", (user_id,)).fetchall():
+        conn.execute(SQL_UPSERT_COHORT, (domain, -1, -score, -int(score >= JOB_READY_SCORE)))
+    conn.execute("DELETE FROM assessment_latest WHERE user_id=?", (user_id,))
+    conn.execute("DELETE FROM assessments WHERE user_id=?", (user_id,))
+    conn.execute("DELETE FROM skill_ratings WHERE user_id=?", (user_id,))
+
+def rebuild_assessment_rollups():
+    """Recompute every rollup from the full history (maintenance only)."""
+    with db_transaction() as conn:
+        conn.execute("DELETE FROM assessment_latest")
+        conn.execute("DELETE FROM assessment_cohort")
+        conn.execute("DELETE FROM assessment_daily")
+        conn.execute('''
+        INSERT INTO assessment_latest (user_id, domain, score, previous_score, first_score, assessments, updated_at)
+        SELECT user_id, domain,
+               (SELECT score FROM assessments WHERE user_id=a.user_id AND domain=a.domain ORDER BY id DESC LIMIT 1),
+               (SELECT score FROM assessments WHERE user_id=a.user_id AND domain=a.domain ORDER BY id DESC LIMIT 1 OFFSET 1),
+               (SELECT score FROM assessments WHERE user_id=a.user_id AND domain=a.domain ORDER BY id LIMIT 1),
+               COUNT(*), MAX(created_at)
+        FROM assessments a GROUP BY user_id, domain
+        ''')
+        conn.execute('''
+        INSERT INTO assessment_cohort (domain, users, score_sum, job_ready)
+        SELECT domain, COUNT(*), SUM(score), SUM(score >= ?) FROM assessment_latest GROUP BY domain
+        ''', (JOB_READY_SCORE,))
+        conn.execute('''
+        INSERT INTO assessment_daily (day, domain, assessments, score_sum)
+        SELECT date(created_at, 'unixepoch'), domain, COUNT(*), SUM(score) FROM assessments GROUP BY 1, 2
+        ''')
+
+@perf_timed()
+def latest_assessments(user_id):
+    """Return one row per assessed domain, most recently assessed first."""
+    return db_query(
+        '''
+        SELECT domain, score, previous_score, first_score, assessments, updated_at
+        FROM assessment_latest WHERE user_id=? ORDER BY updated_at DESC
+        ''',
+        (user_id,),
+    )
+
+@perf_timed()
+def assessment_history(user_id, domain, limit=ASSESSMENT_HISTORY_LIMIT):
+    """Return (created_at, score) for the user's latest assessments in a domain, oldest first."""
+    rows = db_query(
+        "SELECT created_at, score FROM assessments WHERE user_id=? AND domain=? ORDER BY id DESC LIMIT ?",
+        (user_id, domain, limit),
+    )
+    return rows[::-1]
+
+@perf_timed()
+def cohort_averages():
+    return db_query(
+        '''
+        SELECT domain, users, score_sum / users, 100.0 * job_ready / users
+        FROM assessment_cohort WHERE users > 0 ORDER BY users DESC, domain
+        '''
+    )
+
+@perf_timed()
+def cohort_trend(days=COHORT_TREND_DAYS):
+    """Return (day, domain, assessments, mean score) for the last days days."""
+    since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - days * 86400))
+    return db_query(
+        "SELECT day, domain, assessments, score_sum / assessments FROM assessment_daily WHERE day >= ? ORDER BY day",
+        (since,),
+    )
+
+# ============= COMMAND LINE =============
+def main(argv=None):
+    global DB_PATH, CLEAR_DUPLICATE_USERNAMES
+    parser = argparse.ArgumentParser(prog="app.py", description="Career Navigator Pro maintenance commands.")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database path (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = commands.add_parser("migrate", help="apply pending schema migrations")
+    migrate_cmd.add_argument("--clear-duplicate-usernames", action="store_true",
+                             help="let only the oldest account keep a duplicated username (migration 2)")
+    links_cmd = commands.add_parser("check-links", help="check catalog links whose cached result is stale")
+    links_cmd.add_argument("--force", action="store_true", help="recheck every link, however recent its result")
+    links_cmd.add_argument("--url", action="append", dest="urls",
+                           help="check this URL instead of the catalog's links; repeatable")
+    commands.add_parser("gc-avatars", help="delete avatar files no profile references")
+    commands.add_parser("rebuild-rollups", help="recompute assessment rollups from the full history")
+    cohort_cmd = commands.add_parser("cohort-report", help="score every user's skill ratings against every domain")
+    cohort_cmd.add_argument("--out", help="also write the report to this CSV file")
+    bench_cmd = commands.add_parser("bench-hash", help="report password hashes/sec for each cost setting")
+    bench_cmd.add_argument("specs", nargs="*", metavar="SPEC",
+                           help=f"hasher spec, e.g. {PASSWORD_HASHER} (default: a range of presets)")
+    bench_cmd.add_argument("--seconds", type=float, default=1.0, help="time spent on each measurement")
+    import_cmd = commands.add_parser("import", help="bulk-import accounts from a CSV/JSONL file")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--format", choices=["csv", "jsonl"])
+    import_cmd.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    export_cmd = commands.add_parser("export", help="stream all accounts to a CSV/JSONL file ('-' for stdout)")
+    export_cmd.add_argument("path")
+    export_cmd.add_argument("--format", choices=["csv", "jsonl"])
+    feedback_cmd = commands.add_parser("export-feedback", help="stream all feedback to a CSV/JSONL file ('-' for stdout)")
+    feedback_cmd.add_argument("path")
+    feedback_cmd.add_argument("--format", choices=["csv", "jsonl"])
+    args = parser.parse_args(argv)
+    DB_PATH = args.db
+
+    if args.command == "migrate":
+        CLEAR_DUPLICATE_USERNAMES = args.clear_duplicate_usernames
+        pool = ConnectionPool(args.db)
+        with pool.connection() as conn:
+            before = schema_version(conn)
+        try:
+            applied = migrate_db(pool)
+        except RuntimeError as e:
+            print(f"Migration failed: {e}", file=sys.stderr)
+            return 1
+        finally:
+            pool.close()
+        if applied:
+            print(f"Migrated {args.db} from version {before} to {applied[-1]}.")
+        else:
+            print(f"{args.db} is up to date (version {before}).")
+    elif args.command == "check-links":
+        results = check_links(args.urls, force=args.force or bool(args.urls))
+        for r in sorted(results, key=lambda r: (r.ok, r.url)):
+            error = f"  ({r.error})" if r.error else ""
+            print(f"{'ok' if r.ok else 'BROKEN':<7} {r.status or '-':>4} {r.elapsed_ms:>7.0f} ms  {r.url}{error}")
+        broken = sum(not r.ok for r in results)
+        print(f"Checked {len(results)} link(s), {broken} broken.", file=sys.stderr)
+        if broken:
+            return 1
+    elif args.command == "rebuild-rollups":
+        rebuild_assessment_rollups()
+        print("Assessment rollups rebuilt from history.")
+    elif args.command == "cohort-report":
+        catalog = get_catalog()
+        started = time.perf_counter()
+        users, report = cohort_report(get_scoring_model(catalog["revision"], catalog))
+        if users:
+            print(report.to_string(index=False))
+            if args.out:
+                report.to_csv(args.out, index=False)
+        print(f"Scored {users} user(s) in {time.perf_counter() - started:.2f}s.", file=sys.stderr)
+    elif args.command == "gc-avatars":
+        removed, freed = gc_avatars()
+        print(f"Removed {removed} unreferenced avatar file(s), {freed / 1024:.0f} KB freed.")
+    elif args.command == "bench-hash":
+        print(f"{'hasher':<28} {'ms/hash':>9} {'hash/s':>9} {f'hash/s x{HASH_WORKERS}':>12}")
+        for spec in args.specs or BENCH_HASHER_SPECS:
+            ms, serial, pooled = benchmark_hasher(spec, args.seconds)
+            marker = " *" if make_hasher(spec).spec == DEFAULT_HASHER.spec else ""
+            print(f"{spec:<28} {ms:>9.1f} {serial:>9.1f} {pooled:>12.1f}{marker}")
+    elif args.command == "import":
+        with open(args.path, newline="", encoding="utf-8") as stream:
+            report = import_users(stream, args.format or detect_format(args.path), args.chunk_size)
+        for line_no, user_id, reason in sorted(report.conflicts + report.invalid):
+            print(f"line {line_no}: {user_id or '-'}: {reason}", file=sys.stderr)
+        print(f"Imported {report.inserted}, skipped {len(report.conflicts)} conflict(s) "
+              f"and {len(report.invalid)} invalid row(s).")
+    elif args.command in ("export", "export-feedback"):
+        export, noun = (export_users, "account(s)") if args.command == "export" else (export_feedback, "feedback entries")
+        fmt = args.format or detect_format(args.path)
+        if args.path == "-":
+            count = export(sys.stdout, fmt)
+        else:
+            with open(args.path, "w", newline="", encoding="utf-8") as out:
+                count = export(out, fmt)
+        print(f"Exported {count} {noun}.", file=sys.stderr)
+    return 0
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+# No background jobs in tests; career_core reads these once, on import.
+os.environ.setdefault("CAREER_APP_CLEANUP_INTERVAL", "0")
+os.environ.setdefault("CAREER_APP_LINK_CHECK_INTERVAL", "0")
+
+import career_core as core  # noqa: E402
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """A migrated database in a temporary directory."""
+    pool = core.ConnectionPool(str(tmp_path / "test.db"))
+    core.migrate_db(pool)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the app's helpers at a fresh database with a cheap password hasher."""
+    monkeypatch.setattr(core, "DB_PATH", str(tmp_path / "users.db"))
+    monkeypatch.setattr(core, "DEFAULT_HASHER", core.make_hasher("pbkdf2-sha256:i=1000"))
+    return core.get_pool()
+
+
+@pytest.fixture
+def app_test(db):
+    """Return a factory for AppTests of app.py on the db fixture's database.
+
+    With a user, the session starts signed in as that account.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    def make(user=None):
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        if user:
+            at.session_state["logged_in"] = True
+            at.session_state["user"] = user
+            at.session_state["user_method"] = "email"
+        return at
+    return make
@@ -0,0 +1,51 @@
+import csv
+import io
+
+import pytest
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+import career_core as core
+
+
+class RecordingStorage(MemoryMediaFileStorage):
+    """The media storage AppTest serves downloads from, kept for inspection."""
+
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.instances.append(self)
+
+
+@pytest.fixture
+def admin_app(app_test, monkeypatch):
+    monkeypatch.setattr("streamlit.testing.v1.app_test.MemoryMediaFileStorage", RecordingStorage)
+    store = core.get_user_store()
+    store.add_users([("email", "admin", "x" * 64), ("email", "student@example.com", "x" * 64)])
+    at = app_test("admin")
+    at.run()
+    at.sidebar.radio(key="main_nav").set_value("Admin").run()
+    return at
+
+
+def downloaded(at, key):
+    button = at.get("download_button")[0]
+    assert button.proto.id.endswith(key)
+    filename = button.proto.url.rsplit("/", 1)[-1]
+    return RecordingStorage.instances[-1].get_file(filename).content.decode("utf-8")
+
+
+def test_account_export_downloads(admin_app):
+    admin_app.button(key="bulk_export_btn").click().run()
+    assert not admin_app.exception
+    rows = list(csv.DictReader(io.StringIO(downloaded(admin_app, "bulk_export_download"))))
+    assert [row["user_id"] for row in rows] == ["admin", "student@example.com"]
+
+
+def test_feedback_export_downloads(admin_app):
+    with core.db_transaction() as conn:
+        conn.execute(core.SQL_INSERT_FEEDBACK, ("student@example.com", "More cloud courses", 1.0))
+    admin_app.selectbox(key="feedback_export_fmt").set_value("jsonl")
+    admin_app.button(key="feedback_export_btn").click().run()
+    assert not admin_app.exception
+    assert "More cloud courses" in downloaded(admin_app, "feedback_export_download")
@@ -0,0 +1,23 @@
+import sqlite3
+
+import pytest
+
+import career_core as core
+
+
+def test_assessment_saves_ratings_history_and_rollups(db):
+    ratings = {"Python": 80, "SQL": 40, "Figma": 10}
+    core.record_assessment("a@example.com", "Data Science", 62.5, ratings, ["Python", "SQL"])
+    assert core.fetch_skill_ratings("a@example.com") == ratings
+    (stored,) = core.db_query("SELECT ratings FROM assessments WHERE user_id=?", ("a@example.com",), one=True)
+    assert stored == '{"Python": 80, "SQL": 40}'
+    assert core.db_query("SELECT users, score_sum FROM assessment_cohort WHERE domain='Data Science'") == [(1, 62.5)]
+
+
+def test_failed_rollup_leaves_no_ratings_or_history(db, monkeypatch):
+    monkeypatch.setattr(core, "SQL_UPSERT_DAILY", "INSERT INTO no_such_table VALUES (?, ?, ?)")
+    with pytest.raises(sqlite3.OperationalError):
+        core.record_assessment("a@example.com", "Data Science", 62.5, {"Python": 80}, ["Python"])
+    assert core.fetch_skill_ratings("a@example.com") == {}
+    assert core.db_query("SELECT COUNT(*) FROM assessments", one=True) == (0,)
+    assert core.db_query("SELECT COUNT(*) FROM assessment_latest", one=True) == (0,)
@@ -0,0 +1,56 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import career_core as core
+
+
+@pytest.fixture
+def avatar_dir(db, tmp_path, monkeypatch):
+    path = tmp_path / "avatars"
+    path.mkdir()
+    monkeypatch.setattr(core, "AVATAR_DIR", str(path))
+    monkeypatch.setattr(core, "AVATAR_THUMB_DIR", str(path / "thumbs"))
+    return path
+
+
+def png(color, size=(300, 200)):
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, "PNG")
+    out.seek(0)
+    return out
+
+
+def test_identical_uploads_share_one_file_and_thumbnail(avatar_dir):
+    first = core.store_avatar(png("red"))
+    assert core.store_avatar(png("red")) == first
+    assert core.store_avatar(png("blue")) != first
+    assert len(list(avatar_dir.glob("*.png"))) == 2
+    assert len(list(avatar_dir.glob("thumbs/*.jpg"))) == 2
+    with Image.open(io.BytesIO(core.load_avatar_thumbnail(first))) as thumb:
+        assert thumb.format == "JPEG" and thumb.size == (core.AVATAR_THUMB_PX, core.AVATAR_THUMB_PX)
+
+
+def test_rejected_uploads_leave_no_files(avatar_dir, monkeypatch):
+    with pytest.raises(ValueError, match="not a PNG or JPEG"):
+        core.store_avatar(io.BytesIO(b"not an image"))
+    monkeypatch.setattr(core, "AVATAR_MAX_BYTES", 10)
+    with pytest.raises(ValueError, match="larger than"):
+        core.store_avatar(png("red"))
+    assert [p for p in avatar_dir.rglob("*") if p.is_file()] == []
+
+
+def test_gc_keeps_referenced_and_recent_files(avatar_dir):
+    kept = core.store_avatar(png("red"))
+    orphan = core.store_avatar(png("blue"))
+    store = core.get_user_store()
+    store.add_user("email", "ann@example.com", "x" * 64)
+    store.update_profile("ann@example.com", ("Ann", None, "", "", "", kept))
+
+    assert core.gc_avatars() == (0, 0)  # the orphan is still within the grace period
+    removed, freed = core.gc_avatars(grace_s=-1)
+    assert removed == 2 and freed > 0  # the orphan and its thumbnail
+    assert os.path.exists(kept) and os.path.exists(core.avatar_thumbnail_path(kept))
+    assert not os.path.exists(orphan) and not os.path.exists(core.avatar_thumbnail_path(orphan))
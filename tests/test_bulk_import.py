@@ -0,0 +1,34 @@
+import io
+import sqlite3
+
+import career_core as core
+
+
+def test_existing_user_ids_stays_under_old_sqlite_variable_limit(pool):
+    store = core.SqliteUserStore(pool)
+    user_ids = [f"student{i}@example.com" for i in range(2500)]
+    assert store.add_users([("email", user_id, "x" * 64) for user_id in user_ids[::2]]) == []
+    with pool.connection() as conn:
+        # SQLite before 3.32 allowed 999 bound parameters per statement.
+        conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        assert core._existing_user_ids(conn, user_ids) == set(user_ids[::2])
+
+
+def test_non_text_fields_reject_only_their_row(db):
+    lines = [
+        '{"method": "email", "user_id": "ann@example.com", "password": "secret1"}',
+        '{"method": "email", "user_id": 123, "password": "secret1"}',
+        '{"method": 1, "user_id": "bob@example.com", "password": "secret1"}',
+        '{"method": "email", "user_id": "cy@example.com", "password": ["secret1"]}',
+        '[1, 2]',
+        '{"method": "Email", "user_id": " dee@example.com ", "password": "secret1"}',
+    ]
+    report = core.import_users(io.StringIO("\n".join(lines) + "\n"), fmt="jsonl")
+    assert report.inserted == 2
+    assert report.invalid == [
+        (2, "123", "user_id must be text"),
+        (3, "bob@example.com", "method must be text"),
+        (4, "cy@example.com", "password must be text"),
+        (5, "", "unparseable row"),
+    ]
+    assert core.user_exists("email", "dee@example.com")
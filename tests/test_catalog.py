@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import career_core as core
+
+
+@pytest.fixture
+def catalog_path(tmp_path, monkeypatch):
+    path = tmp_path / "career_catalog.json"
+    shutil.copy(core.CATALOG_PATH, path)
+    monkeypatch.setattr(core, "CATALOG_PATH", str(path))
+    core._last_good_catalog.clear()
+    yield path
+    core._last_good_catalog.clear()
+
+
+def touch(path, seconds):
+    os.utime(path, ns=(seconds * 10**9, seconds * 10**9))
+
+
+def test_broken_edit_is_logged_once_and_the_fix_is_picked_up(catalog_path, capsys):
+    good = catalog_path.read_text(encoding="utf-8")
+    touch(catalog_path, 1_000_000)
+    loaded = core.get_catalog()
+
+    catalog_path.write_text("{not json", encoding="utf-8")
+    touch(catalog_path, 1_000_001)
+    for _ in range(3):
+        assert core.get_catalog() is loaded
+    assert capsys.readouterr().err.count("Could not reload") == 1
+
+    catalog_path.write_text(good, encoding="utf-8")
+    touch(catalog_path, 1_000_002)
+    assert core.get_catalog()["revision"] == 1_000_002 * 10**9
+    assert capsys.readouterr().err == ""
+
+
+def tiny_catalog(resources):
+    return {
+        "resources": [{"name": name, "desc": desc, "domains": ["*"], "link": ""} for name, desc in resources],
+        "skills_now": [], "skills_future": [], "requirements": {},
+    }
+
+
+def test_search_matches_word_prefixes():
+    index = core.SearchIndex(tiny_catalog([("Python Basics", ""), ("R for Statistics", ""), ("Rust Book", "")]))
+    assert [row[1] for row in index.search("pyth bas")] == ["Python Basics"]
+    assert [row[1] for row in index.search("ru")] == ["Rust Book"]
+    # A single letter is a whole word, not a prefix of every word.
+    assert [row[1] for row in index.search("r")] == ["R for Statistics"]
+
+
+def test_search_ranks_name_matches_above_description_matches():
+    index = core.SearchIndex(tiny_catalog([("Data Course", "Covers kubernetes"), ("Kubernetes Course", "Containers")]))
+    assert [row[1] for row in index.search("kubernetes")] == ["Kubernetes Course", "Data Course"]
+
+
+def test_search_index_is_rebuilt_when_the_catalog_changes(catalog_path):
+    touch(catalog_path, 1_000_000)
+    assert core.search_catalog("zanzibar") == []
+
+    raw = json.loads(catalog_path.read_text(encoding="utf-8"))
+    raw["resources"].append({"name": "Zanzibar Bootcamp", "link": "https://example.com", "desc": "", "domains": ["*"]})
+    catalog_path.write_text(json.dumps(raw), encoding="utf-8")
+    touch(catalog_path, 1_000_001)
+    assert [r["name"] for r in core.search_catalog("zanzibar")] == ["Zanzibar Bootcamp"]
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+import pytest
+from streamlit.runtime.context import StreamlitHeaders
+
+import career_core as core
+
+
+@pytest.fixture
+def context(monkeypatch):
+    def connect(ip_address, forwarded=()):
+        headers = StreamlitHeaders([("X-Forwarded-For", value) for value in forwarded])
+        monkeypatch.setattr(core, "st", SimpleNamespace(context=SimpleNamespace(headers=headers, ip_address=ip_address)))
+    return connect
+
+
+def test_forwarded_header_is_ignored_without_trusted_proxies(context):
+    context("203.0.113.7", ["198.51.100.1"])
+    assert core.client_address() == "203.0.113.7"
+
+
+def test_address_added_by_the_outermost_trusted_proxy_is_used(context, monkeypatch):
+    monkeypatch.setattr(core, "TRUSTED_PROXIES", 2)
+    # The client made up the first entry; two proxies appended the rest.
+    context("10.0.0.2", ["1.2.3.4, 203.0.113.7", "10.0.0.1"])
+    assert core.client_address() == "203.0.113.7"
+    context("10.0.0.2", ["10.0.0.1"])
+    assert core.client_address() is None
+
+
+def test_streamlit_without_ip_address_reports_no_address(monkeypatch):
+    monkeypatch.setattr(core, "st", SimpleNamespace(context=SimpleNamespace(headers=StreamlitHeaders([]))))
+    assert core.client_address() is None
@@ -0,0 +1,48 @@
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+import career_core as core
+
+
+@pytest.fixture
+def writer(db):
+    writer = core.FeedbackWriter(flush_interval=3600, max_pending=2)
+    yield writer
+    writer.close()
+
+
+def stored_messages():
+    return [row[0] for row in core.db_query("SELECT message FROM feedback ORDER BY id")]
+
+
+def test_refused_row_is_set_aside_and_later_rows_still_land(writer):
+    writer.submit("a@example.com", "Great resources")
+    writer.submit("b@example.com", "   ")  # violates the CHECK constraint
+    assert writer.flush() == 1
+    assert writer.failed == 1 and writer.dead_letters[0][1] == "   "
+    assert writer.pending == 0
+    writer.submit("c@example.com", "More cloud courses")
+    assert writer.flush() == 1
+    assert stored_messages() == ["Great resources", "More cloud courses"]
+
+
+def test_unavailable_database_keeps_a_bounded_retry_list(writer, monkeypatch):
+    @contextmanager
+    def locked(pool=None):
+        raise sqlite3.OperationalError("database is locked")
+        yield
+
+    real_transaction = core.db_transaction
+    monkeypatch.setattr(core, "db_transaction", locked)
+    writer.submit("a@example.com", "one")
+    writer.submit("b@example.com", "two")
+    assert writer.flush() == 0
+    writer.submit("c@example.com", "three")
+    assert writer.flush() == 0
+    assert writer.pending == 2 and writer.rejected == 1
+
+    monkeypatch.setattr(core, "db_transaction", real_transaction)
+    assert writer.flush() == 2
+    assert stored_messages() == ["one", "two"]
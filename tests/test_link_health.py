@@ -0,0 +1,137 @@
+import asyncio
+import http.server
+import socket
+import threading
+import time
+
+import pytest
+
+import career_core as core
+
+DELAY = 0.1
+
+
+class StubServer:
+    """A local HTTP server that records every request it answers."""
+
+    def __init__(self):
+        self.hits = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.port = self.server.server_address[1]
+
+    def handler(self):
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self.respond(body=False)
+
+            def do_GET(self):
+                self.respond(body=True)
+
+            def respond(self, body):
+                with stub.lock:
+                    stub.hits.append((self.headers["Host"].split(":")[0], self.path, time.monotonic()))
+                    stub.in_flight += 1
+                    stub.peak = max(stub.peak, stub.in_flight)
+                time.sleep(0.05)
+                with stub.lock:
+                    stub.in_flight -= 1
+                if self.path == "/etag":
+                    if self.headers.get("If-None-Match") == '"v1"':
+                        return self.finish(304, {"ETag": '"v1"'})
+                    return self.finish(200, {"ETag": '"v1"'}, body)
+                if self.path == "/dated":
+                    stamp = "Wed, 01 Jan 2025 00:00:00 GMT"
+                    if self.headers.get("If-Modified-Since") == stamp:
+                        return self.finish(304)
+                    return self.finish(200, {"Last-Modified": stamp}, body)
+                if self.path == "/get-only":
+                    return self.finish(405 if self.command == "HEAD" else 200, {}, body)
+                if self.path == "/moved":
+                    return self.finish(301, {"Location": "/landing"})
+                if self.path == "/landing":
+                    return self.finish(200, {}, body)
+                self.finish(404, {}, body)
+
+            def finish(self, status, headers=None, body=False):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                payload = b"ok" if body and status == 200 else b""
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if payload:
+                    self.wfile.write(payload)
+
+        return Handler
+
+    def urls(self):
+        return [f"http://{host}:{self.port}{path}" for host in ("127.0.0.1", "localhost")
+                for path in ("/etag", "/dated", "/get-only", "/moved", "/missing")]
+
+    def check(self, urls, previous=None, concurrency=4):
+        results = asyncio.run(core.check_links_async(urls, previous, concurrency=concurrency,
+                                                     host_delay=DELAY, timeout=5))
+        return {r.url: r for r in results}
+
+    def gaps(self, hits):
+        """Seconds between consecutive requests to each host."""
+        by_host = {}
+        for host, path, at in hits:
+            if path != "/landing":  # redirects are followed within one paced request
+                by_host.setdefault(host, []).append(at)
+        return [later - earlier for times in by_host.values() for earlier, later in zip(times, times[1:])]
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    threading.Thread(target=server.server.serve_forever, daemon=True).start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture
+def refused_url():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{unused.getsockname()[1]}/refused"
+
+
+def test_responses_are_classified(stub, refused_url):
+    base = f"http://127.0.0.1:{stub.port}"
+    results = stub.check(stub.urls() + [refused_url])
+    assert results[f"{base}/etag"].ok and results[f"{base}/etag"].status == 200
+    assert not results[f"{base}/missing"].ok and results[f"{base}/missing"].error == "HTTP 404"
+    assert not results[refused_url].ok and results[refused_url].error
+    assert results[f"{base}/get-only"].ok  # HEAD refused, GET answered
+    assert results[f"{base}/moved"].final_url == f"{base}/landing"
+
+
+def test_unchanged_pages_are_revalidated_with_304(stub):
+    base = f"http://127.0.0.1:{stub.port}"
+    first = stub.check(stub.urls())
+    second = stub.check(stub.urls(), first)
+    assert second[f"{base}/etag"].status == 304 and second[f"{base}/etag"].ok
+    assert second[f"{base}/etag"].etag == '"v1"'
+    assert second[f"{base}/dated"].status == 304
+    assert second[f"{base}/missing"].failures == 2
+
+
+def test_requests_are_paced_per_host(stub):
+    stub.check(stub.urls(), concurrency=1)
+    assert stub.peak == 1
+    first_hits = len(stub.hits)
+    stub.peak = 0
+    stub.check(stub.urls(), concurrency=4)
+    assert stub.peak <= 2  # two hosts, one request each at a time
+    gaps = stub.gaps(stub.hits[:first_hits]) + stub.gaps(stub.hits[first_hits:])
+    assert gaps and min(gaps) >= DELAY
@@ -0,0 +1,27 @@
+import career_core as core
+
+
+def lock(guard, account):
+    for _ in range(core.LOGIN_MAX_FAILURES):
+        guard.record_failure(account)
+
+
+def test_expired_lockouts_are_dropped_when_read(db, monkeypatch):
+    guard = core.LoginGuard()
+    lock(guard, "email:ann@example.com")
+    assert guard.check("email:ann@example.com") > 0
+
+    now = core.time.time()
+    monkeypatch.setattr(core.time, "time", lambda: now + core.LOGIN_LOCKOUT_S + 1)
+    assert guard.check("email:ann@example.com") == 0
+    assert guard.lockouts == {}
+
+
+def test_lockouts_in_memory_are_capped(db, monkeypatch):
+    monkeypatch.setattr(core, "THROTTLE_MAX_KEYS", 3)
+    guard = core.LoginGuard()
+    for i in range(5):
+        lock(guard, f"email:user{i}@example.com")
+    assert list(guard.lockouts) == [f"email:user{i}@example.com" for i in (2, 3, 4)]
+    # The dropped ones are still in SQLite and apply again after a restart.
+    assert core.db_query("SELECT COUNT(*) FROM login_lockouts", one=True) == (5,)
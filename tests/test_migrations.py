@@ -0,0 +1,62 @@
+import pytest
+
+import career_core as core
+
+
+def test_keyed_lookups_use_an_index(pool):
+    with pool.connection() as conn:
+        assert core.check_query_plans(conn) == {}
+
+
+def test_profile_read_is_covered_by_its_index(pool):
+    with pool.connection() as conn:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {core.SQL_FETCH_PROFILE}", ("",))]
+    assert plan == ["SEARCH users USING COVERING INDEX idx_users_profile (user_id=?)"]
+
+
+def test_profile_index_is_rebuilt_to_cover_the_read(tmp_path):
+    pool = core.ConnectionPool(str(tmp_path / "v10.db"))
+    with pool.connection() as conn:
+        for _version, _description, apply in core.MIGRATIONS[:10]:
+            apply(conn)
+        conn.execute("DROP INDEX idx_users_profile")
+        conn.execute("CREATE INDEX idx_users_profile ON users (user_id, name, username, pronouns, avatar)")
+        conn.execute("PRAGMA user_version=10")
+        conn.commit()
+        core.migrate_db(pool)
+        columns = [row[2] for row in conn.execute("PRAGMA index_info(idx_users_profile)")]
+    pool.close()
+    assert columns == ["user_id", "name", "username", "pronouns", "bio", "links", "avatar"]
+
+
+def _version_1_db(tmp_path):
+    pool = core.ConnectionPool(str(tmp_path / "old.db"))
+    with pool.connection() as conn:
+        core._migration_001_users(conn)
+        conn.execute("PRAGMA user_version=1")
+        conn.executemany(
+            "INSERT INTO users (method, user_id, password, username) VALUES ('email', ?, 'x', ?)",
+            [("first@example.com", "sam"), ("second@example.com", "sam"), ("third@example.com", " ")],
+        )
+        conn.commit()
+    return pool
+
+
+def test_duplicate_usernames_stop_migration(tmp_path):
+    pool = _version_1_db(tmp_path)
+    with pytest.raises(RuntimeError, match="second@example.com"):
+        core.migrate_db(pool)
+    with pool.connection() as conn:
+        assert core.schema_version(conn) == 1
+        assert conn.execute("SELECT COUNT(*) FROM users WHERE username='sam'").fetchone()[0] == 2
+    pool.close()
+
+
+def test_duplicate_usernames_cleared_on_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "CLEAR_DUPLICATE_USERNAMES", True)
+    pool = _version_1_db(tmp_path)
+    core.migrate_db(pool)
+    with pool.connection() as conn:
+        rows = conn.execute("SELECT user_id, username FROM users ORDER BY id").fetchall()
+    pool.close()
+    assert rows == [("first@example.com", "sam"), ("second@example.com", None), ("third@example.com", None)]
@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+import career_core as core
+
+
+def test_hasher_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        core.KdfHasher()
+
+    class Incomplete(core.KdfHasher):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_round_trip_and_rehash():
+    hasher = core.make_hasher("pbkdf2-sha256:i=1000")
+    encoded = hasher.hash("s3cret-pass")
+    assert core.check_password("s3cret-pass", encoded)[0]
+    assert not core.check_password("wrong", encoded)[0]
+    legacy = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"  # sha256("")
+    assert core.check_password("", legacy) == (True, True)
+
+
+def test_unknown_account_still_pays_for_a_hash(db, monkeypatch):
+    checked = []
+    real_check = core.check_password
+    monkeypatch.setattr(core, "check_password", lambda *args: checked.append(args) or real_check(*args))
+    assert core.login_user("email", "nobody@example.com", "guess") is None
+    assert len(checked) == 1
+
+
+def test_import_hashes_off_the_sign_in_pool(db, monkeypatch):
+    def sign_in_pool():
+        raise AssertionError("bulk import used the sign-in hash pool")
+
+    monkeypatch.setattr(core, "get_hash_executor", sign_in_pool)
+    rows = "method,user_id,password\n" + "".join(f"email,student{i}@example.com,pw-{i:04d}x\n" for i in range(20))
+    report = core.import_users(io.StringIO(rows), "csv")
+    assert report.inserted == 20
@@ -0,0 +1,26 @@
+import career_core as core
+
+
+def rerun_totals(family, label):
+    for fam, lab, count, total, _quantiles, _max in core.get_perf_registry().snapshot():
+        if (fam, lab) == (family, label):
+            return count, total
+    return 0, 0.0
+
+
+def test_profile_rerun_counts_its_account_queries(app_test):
+    core.get_user_store().add_user("email", "ann@example.com", "x" * 64)
+    at = app_test("ann@example.com")
+    at.run()
+    core.get_perf_registry().reset()
+    at.sidebar.radio(key="main_nav").set_value("Profile").run()
+    next(b for b in at.button if b.label == "Edit Profile").click().run()
+    next(t for t in at.text_input if t.label == "Name").input("Ann")
+    next(b for b in at.button if b.label == "💾 Save Changes").click().run()
+    assert not at.exception
+
+    reruns, calls = rerun_totals("rerun_db_calls", "Profile")
+    assert reruns >= 3
+    # At least the profile read and the profile write.
+    assert calls >= 2
+    assert rerun_totals("rerun_db", "Profile")[1] > 0
@@ -0,0 +1,16 @@
+import sqlite3
+
+import pytest
+
+import career_core as core
+
+
+def test_exhausted_pool_fails_like_a_busy_database(tmp_path):
+    pool = core.ConnectionPool(str(tmp_path / "small.db"), size=1, busy_timeout_ms=50)
+    with pool.connection():
+        with pytest.raises(sqlite3.OperationalError, match="connections are busy"):
+            with pool.connection():
+                pass
+    with pool.connection() as conn:  # the held connection was returned
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    pool.close()
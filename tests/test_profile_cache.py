@@ -0,0 +1,20 @@
+import career_core as core
+
+
+def test_versions_stay_bounded_and_evicted_users_never_read_stale(db, monkeypatch):
+    monkeypatch.setattr(core, "PROFILE_CACHE_SIZE", 3)
+    state = core.profile_cache_state()
+    store = core.get_user_store()
+    store.add_users([("email", f"user{i}@example.com", "x" * 64) for i in range(6)])
+
+    store.update_profile("user0@example.com", ("Before", None, "", "", "", ""))
+    core.invalidate_profile("user0@example.com")
+    assert core.get_profile("user0@example.com")[0] == "Before"
+    store.update_profile("user0@example.com", ("After", None, "", "", "", ""))
+    core.invalidate_profile("user0@example.com")
+    for i in range(1, 6):
+        core.invalidate_profile(f"user{i}@example.com")
+
+    assert len(state.versions) <= 3
+    assert "user0@example.com" not in state.versions
+    assert core.get_profile("user0@example.com")[0] == "After"
@@ -0,0 +1,49 @@
+import pytest
+
+import career_core as core
+
+CATALOG = {
+    "domains": ["Data", "Design", "Empty"],
+    "requirements": {
+        "Data": [{"skill": "Python", "target": 80, "weight": 3}, {"skill": "SQL", "target": 50, "weight": 1}],
+        "Design": [{"skill": "Figma", "target": 60, "weight": 1}],
+    },
+}
+
+
+@pytest.fixture
+def model():
+    return core.ScoringModel(CATALOG)
+
+
+def test_readiness_and_gaps_follow_the_weighted_formula(model):
+    assert model.domains == ["Data", "Design"]  # a domain with no requirements is not scored
+    confidence = model.confidence_vector({"Python": 40, "SQL": 100, "Cooking": 90})
+    readiness, gaps = model.score(confidence[None, :])
+    # Data: 3/4 * 40/80 + 1/4 * 1 (capped); Design: Figma unrated counts as 0.
+    assert readiness[0].tolist() == pytest.approx([62.5, 0.0])
+    assert gaps[0, 0, model.skill_index["Python"]] == pytest.approx(0.75 * 40)
+    assert gaps[0, 0, model.skill_index["SQL"]] == 0
+
+
+def test_recommendations_put_the_biggest_weighted_gap_first(model):
+    confidence = model.confidence_vector({"Python": 70, "SQL": 10})
+    # Python is 10 short at weight 3/4 (7.5); SQL is 40 short at weight 1/4 (10).
+    assert model.recommend(confidence, "Data") == [("SQL", 40.0), ("Python", 10.0)]
+    assert model.recommend(model.confidence_vector({"Figma": 60}), "Design") == []
+
+
+def test_cohort_report_is_the_same_in_any_chunk_size(db, model, monkeypatch):
+    with core.db_transaction() as conn:
+        for i, (python, sql, figma) in enumerate([(80, 50, 0), (0, 0, 60), (40, 100, 30)]):
+            core.save_skill_ratings(conn, f"user{i}@example.com", {"Python": python, "SQL": sql, "Figma": figma}, 0)
+        core.save_skill_ratings(conn, "old@example.com", {"Retired skill": 90}, 0)
+
+    users, whole = core.cohort_report(model)
+    monkeypatch.setattr(core, "COHORT_CHUNK", 1)
+    _, chunked = core.cohort_report(model)
+    assert users == 4
+    assert whole.equals(chunked)
+    data = whole.set_index("Domain").loc["Data"]
+    assert data["Job-ready %"] == 25.0  # only user0 reaches 70
+    assert data["Best fit (users)"] == 3  # user0, user2 and old (all zero; ties go to the first domain)
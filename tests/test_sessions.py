@@ -0,0 +1,73 @@
+import career_core as core
+
+
+def test_rotating_replaces_the_old_token_and_keeps_the_expiry(db):
+    store = core.SessionStore(b"test-key", ttl=3600, grace=0)
+    token = store.issue("a@example.com", "email")
+    (expires_at,) = core.db_query("SELECT expires_at FROM sessions", one=True)
+
+    rotated = store.rotate(token)
+    assert rotated and rotated != token
+    assert store.resume(token) is None
+    assert store.check(token, signed_in=True) == ("a@example.com", "email", True)
+    assert store.resume(rotated) == ("a@example.com", "email")
+    assert core.db_query("SELECT DISTINCT expires_at FROM sessions") == [(expires_at,)]
+    assert store.active_sessions() == 1
+
+
+def test_replaced_token_opens_new_tabs_only_within_the_grace_period(db):
+    store = core.SessionStore(b"test-key", ttl=3600, grace=60)
+    token = store.issue("a@example.com", "email")
+    store.rotate(token)
+    assert store.resume(token) == ("a@example.com", "email")
+    core.db_execute("UPDATE sessions SET replaced_at=replaced_at - 60")
+    store.cache.clear()
+    assert store.resume(token) is None
+
+
+def test_logout_ends_every_token_of_the_sign_in(db):
+    store = core.SessionStore(b"test-key", ttl=3600)
+    token = store.issue("a@example.com", "email")
+    other = store.issue("a@example.com", "email")
+    rotated = store.rotate(token)
+    store.revoke(rotated)
+    assert store.check(token, signed_in=True) is None
+    assert store.check(rotated, signed_in=True) is None
+    assert store.resume(other) == ("a@example.com", "email")
+
+
+def test_expired_session_is_not_rotated(db):
+    store = core.SessionStore(b"test-key", ttl=0)
+    assert store.rotate(store.issue("a@example.com", "email")) is None
+
+
+def test_resuming_from_the_url_replaces_the_token(app_test):
+    token = core.get_session_store().issue("a@example.com", "email")
+
+    at = app_test()
+    at.query_params[core.SESSION_PARAM] = token
+    at.run()
+    assert not at.exception
+    assert at.session_state["user"] == "a@example.com"
+    assert at.query_params[core.SESSION_PARAM] not in ("", token)
+
+
+def test_opening_the_link_in_a_second_tab_keeps_the_first_signed_in(app_test, monkeypatch):
+    monkeypatch.setattr(core.get_session_store(), "grace", 0)
+    token = core.get_session_store().issue("a@example.com", "email")
+    first = app_test()
+    first.query_params[core.SESSION_PARAM] = token
+    first.run()
+    first_token = first.query_params[core.SESSION_PARAM]
+
+    second = app_test()
+    second.query_params[core.SESSION_PARAM] = first_token
+    second.run()
+    assert second.session_state["user"] == "a@example.com"
+
+    first.run()
+    assert not first.exception
+    assert first.session_state["logged_in"] and first.session_state["user"] == "a@example.com"
+    # The first tab swapped in a token of its own, which a reload can resume.
+    assert first.query_params[core.SESSION_PARAM] not in (first_token, second.query_params[core.SESSION_PARAM])
+    assert core.get_session_store().resume(first.query_params[core.SESSION_PARAM]) == ("a@example.com", "email")
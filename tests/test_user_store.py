@@ -0,0 +1,165 @@
+import sqlite3
+
+import pytest
+
+import career_core as core
+
+PROFILE = ("Ann", "ann", "she/her", "bio", "https://example.com", "profile_avatars/ann.png")
+
+
+@pytest.fixture(params=list(core.USER_STORES))
+def store(request):
+    """An empty store of every backend."""
+    if request.param == "sqlite":
+        return core.SqliteUserStore(request.getfixturevalue("pool"))
+    return core.USER_STORES[request.param]()
+
+
+@pytest.fixture
+def filled(store):
+    """ann (email, with a profile), bob (email) and 5550100 (phone)."""
+    store.add_user("email", "ann@example.com", "h1")
+    store.add_users([("email", "bob@example.com", "h"), ("phone", "5550100", "h")])
+    store.update_profile("ann@example.com", PROFILE)
+    store.update_profile("bob@example.com", ("Bob", None, "", "", "", ""))
+    store.update_profile("5550100", ("Cy", None, "", "", "", ""))
+    return store
+
+
+def test_user_store_is_abstract():
+    with pytest.raises(TypeError):
+        core.UserStore()
+
+
+def test_add_and_find(store):
+    assert store.add_user("email", "ann@example.com", "h1") is True
+    assert store.add_user("phone", "ann@example.com", "h1") is False
+    assert store.exists("email", "ann@example.com")
+    assert not store.exists("phone", "ann@example.com")
+    assert store.find_login("email", "ann@example.com")[1:] == ("email", "ann@example.com", "h1")
+    assert store.find_login("email", "nobody@example.com") is None
+
+
+def test_add_users_skips_taken_ids(store):
+    store.add_user("email", "ann@example.com", "h1")
+    rows = [("email", "bob@example.com", "h"), ("phone", "ann@example.com", "h"), ("phone", "5550100", "h")]
+    assert store.add_users(rows) == ["ann@example.com"]
+    assert store.existing_user_ids(["bob@example.com", "eve@example.com"]) == {"bob@example.com"}
+
+
+def test_empty_user_id_is_rejected(store):
+    # Refused either as a failed insert or with ValueError.
+    try:
+        added = store.add_user("email", " ", "h")
+    except ValueError:
+        added = False
+    assert added is False
+    assert not store.exists("email", " ")
+
+
+def test_passwords(store):
+    store.add_user("email", "ann@example.com", "h1")
+    row_id = store.find_login("email", "ann@example.com")[0]
+    assert store.replace_password(row_id, "other", "h2") is False
+    assert store.replace_password(row_id, "h1", "h2") is True
+    assert store.set_password("email", "ann@example.com", "h3") == 1
+    assert store.find_login("email", "ann@example.com")[3] == "h3"
+
+
+def test_profiles(filled):
+    assert filled.get_profile("ann@example.com") == PROFILE
+    assert filled.get_profile("eve@example.com") is None
+    with pytest.raises(core.UsernameTaken):
+        filled.update_profile("bob@example.com", ("Bob", "ann", "", "", "", ""))
+    assert filled.avatars_in_use() == {"profile_avatars/ann.png"}
+
+
+def test_listing_and_counting(filled):
+    first = filled.list_users(0, 2)
+    assert [r[2] for r in first] == ["ann@example.com", "bob@example.com"]
+    assert [r[2] for r in filled.list_users(first[-1][0], 2)] == ["5550100"]
+    assert [r[2] for r in filled.list_users(0, 10, search="bo")] == ["bob@example.com"]
+    assert len(filled.list_users(0, 10, search="@example", match="substring")) == 2
+    assert [r[2] for r in filled.list_users(0, 10, method="phone")] == ["5550100"]
+    assert filled.count_users() == 3
+    assert filled.count_users(search="5", method="phone") == 1
+
+
+def test_prefix_search_pages_in_user_id_order(store):
+    store.add_users([("email", user_id, "h") for user_id in ("ab3", "zz", "ab1", "ab2", "ac", "ab0")])
+    pages, after = [], 0
+    while True:
+        page = store.list_users(after, 2, search="ab")
+        if not page:
+            break
+        pages.append([r[2] for r in page])
+        after = core.user_page_cursor(page[-1], "ab")
+    assert pages == [["ab0", "ab1"], ["ab2", "ab3"]]
+    assert core.user_page_cursor((7, "email", "ab3"), "ab", "substring") == 7
+    assert core.user_page_cursor((7, "email", "ab3")) == 7
+
+
+def test_prefix_search_reads_an_index_range(pool):
+    with pool.connection() as conn:
+        for after in (0, "ab1"):
+            sql, params = core._user_page_query(after, 50, "ab")
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            assert plan == ["SEARCH users USING INDEX sqlite_autoindex_users_1 (user_id>? AND user_id<?)"]
+
+
+def test_export_pages(filled):
+    exported = filled.export_page(0, 10)
+    assert [(r[2], r[3]) for r in exported] == [("ann@example.com", "Ann"), ("bob@example.com", "Bob"), ("5550100", "Cy")]
+    assert filled.export_page(exported[1][0], 10) == exported[2:]
+
+
+def test_delete(filled):
+    assert filled.delete_user("bob@example.com") == 1
+    assert filled.delete_user("bob@example.com") == 0
+    assert filled.count_users() == 2
+
+
+def test_taken_username_is_reported_on_a_later_rerun(app_test):
+    # The store is cached by the first run; the save happens runs later.
+    store = core.get_user_store()
+    store.add_users([("email", "ann@example.com", "x" * 64), ("email", "bob@example.com", "x" * 64)])
+    store.update_profile("ann@example.com", ("Ann", "ann", "", "", "", ""))
+
+    at = app_test("bob@example.com")
+    at.run()
+    at.sidebar.radio(key="main_nav").set_value("Profile").run()
+    next(b for b in at.button if b.label == "Edit Profile").click().run()
+    next(t for t in at.text_input if t.label == "Username").input("ann")
+    next(b for b in at.button if b.label == "💾 Save Changes").click().run()
+    assert not at.exception
+    assert "The username 'ann' is already taken." in [e.value for e in at.error]
+
+
+
+def test_account_and_assessments_are_deleted_together(db, monkeypatch):
+    core.get_user_store().add_user("email", "ann@example.com", "x" * 64)
+    core.record_assessment("ann@example.com", "Data Science", 70, {"Python": 70}, ["Python"])
+    forget = core.forget_user_assessments
+
+    def forget_then_fail(conn, user_id):
+        forget(conn, user_id)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(core, "forget_user_assessments", forget_then_fail)
+        with pytest.raises(sqlite3.OperationalError):
+            core.delete_user("ann@example.com")
+    assert core.user_exists("email", "ann@example.com")
+    assert core.db_query("SELECT COUNT(*) FROM assessments", one=True) == (1,)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(core, "SQL_DELETE_USER", "DELETE FROM no_such_table WHERE user_id=?")
+        with pytest.raises(sqlite3.OperationalError):
+            core.delete_user("ann@example.com")
+    assert core.db_query("SELECT COUNT(*) FROM assessments", one=True) == (1,)
+    assert core.db_query("SELECT users FROM assessment_cohort", one=True) == (1,)
+
+    core.delete_user("ann@example.com")
+    assert not core.user_exists("email", "ann@example.com")
+    assert core.db_query("SELECT COUNT(*) FROM assessments", one=True) == (0,)
+    assert core.db_query("SELECT users FROM assessment_cohort", one=True) == (0,)